@@ -163,58 +163,71 @@ uploaded_file = st.file_uploader(
 
 st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
 
+# --- TABLEAU DES RÉSULTATS ---
+def note_from_score(score):
+    # "Note ajustée" selon le score_final
+    if score >= 5:
+        return '<span class="badge badge-tres-haut">Très élevée</span>'
+    elif score >= 4.3:
+        return '<span class="badge badge-haut">Élevée</span>'
+    elif score >= 3.8:
+        return '<span class="badge badge-moyen">Modérée</span>'
+    else:
+        return '<span class="badge badge-bas">Faible</span>'
+
+
+def results_table(results, investment_horizon):
+    # Convertir le dictionnaire en DataFrame
+    df = pd.DataFrame.from_dict(results, orient="index")
+    df.index.name = "Entreprise"
+    df.reset_index(inplace=True)
+
+    # Renommer les colonnes
+    df.rename(columns={
+        "score_final": "Exposition globale",
+        "impact_temporiel": "Impact temporel"
+    }, inplace=True)
+
+    df["Note ajustée"] = df["Exposition globale"].apply(note_from_score)
+    df["Horizon choisi"] = investment_horizon
+
+    # Réorganiser les colonnes
+    return df[["Entreprise", "Exposition globale", "Impact temporel", "Note ajustée", "Horizon choisi"]]
+
+
 # --- ACTION ---
 if st.button("Tok me"):
     if uploaded_file is not None:
         with st.spinner("⏳ Analyse du fichier en cours..."):
             try:
                 law_resume = getLawInformations(uploaded_file)
-                results = functions.getTop10(law_resume, investment_horizon)
-                results = dict(list(results.items())[:10])
-
-                # Convertir le dictionnaire en DataFrame
-                df = pd.DataFrame.from_dict(results, orient="index")
-                df.index.name = "Entreprise"
-                df.reset_index(inplace=True)
-
-                # Renommer les colonnes
-                df.rename(columns={
-                    "score_final": "Exposition globale",
-                    "impact_temporiel": "Impact temporel"
-                }, inplace=True)
-
-                # Ajouter la "Note ajustée" selon le score_final
-                def note_from_score(score):
-                    if score >= 5:
-                        return '<span class="badge badge-tres-haut">Très élevée</span>'
-                    elif score >= 4.3:
-                        return '<span class="badge badge-haut">Élevée</span>'
-                    elif score >= 3.8:
-                        return '<span class="badge badge-moyen">Modérée</span>'
-                    else:
-                        return '<span class="badge badge-bas">Faible</span>'
-
-                df["Note ajustée"] = df["Exposition globale"].apply(note_from_score)
-                df["Horizon choisi"] = investment_horizon
-
-                # Réorganiser les colonnes
-                df = df[["Entreprise", "Exposition globale", "Impact temporel", "Note ajustée", "Horizon choisi"]]
-
-                # Afficher la table stylisée
-                st.success("✅ Analyse terminée avec succès !")
-                st.markdown("### Résultat de l’analyse :")
-                st.markdown(df.to_html(escape=False, index=False), unsafe_allow_html=True)
 
-                # Récupérer les graphes correspondants
-                spiderCharts = functions.getSpiderCharts(results.keys(), law_resume)
-
-                # --- Affichage direct de tous les graphes ---
-                st.markdown("<br>", unsafe_allow_html=True)
-                st.markdown("### 📊 Graphes radar par entreprise :")
-
-                for entreprise in df["Entreprise"]:
-                    st.image(spiderCharts[entreprise], caption=f"Graphe radar de {entreprise}")
-                    st.markdown("<hr style='border:1px solid #333;'>", unsafe_allow_html=True)
+                # Tableau mis à jour au fil du scoring, avec le top 10 courant
+                st.markdown("### Résultat de l’analyse :")
+                table = st.empty()
+                results = {}
+                for top in functions.iterTop10(law_resume, investment_horizon):
+                    if not top:
+                        continue
+                    results = top
+                    df = results_table(results, investment_horizon)
+                    table.markdown(df.to_html(escape=False, index=False), unsafe_allow_html=True)
+
+                if not results:
+                    st.warning("⚠️ Aucune entreprise n'a pu être scorée pour cette loi.")
+                else:
+                    st.success("✅ Analyse terminée avec succès !")
+
+                    # Récupérer les graphes correspondants
+                    spiderCharts = functions.getSpiderCharts(results.keys(), law_resume)
+
+                    # --- Affichage direct de tous les graphes ---
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    st.markdown("### 📊 Graphes radar par entreprise :")
+
+                    for entreprise in df["Entreprise"]:
+                        st.image(spiderCharts[entreprise], caption=f"Graphe radar de {entreprise}")
+                        st.markdown("<hr style='border:1px solid #333;'>", unsafe_allow_html=True)
 
             except Exception as e:
                 st.error(f"❌ Erreur lors du traitement : {e}")
@@ -0,0 +1,201 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+COMPANY_STORE_DIR = os.environ.get("COMPANY_STORE_DIR", os.path.join(tempfile.gettempdir(), "companyProfiles"))
+COMPANY_STORE_FILENAME = "_profiles.arrow"
+
+# Champs du résumé 10-K (Company10k) : texte libre, tout le reste est une liste de chaînes
+STRING_FIELDS = ("business_resume", "business_model")
+LIST_FIELDS = ("risk_factor", "property", "sector", "sub_sector", "country_headquarters", "country_of_production",
+               "country_of_operation", "country_of_ressource", "client_country", "client_type")
+
+
+def _schema():
+    return pa.schema(
+        [("name", pa.string()), ("etag", pa.string())]
+        + [(field, pa.string()) for field in STRING_FIELDS]
+        + [(field, pa.list_(pa.string())) for field in LIST_FIELDS]
+        + [("extra", pa.string())]
+    )
+
+
+def _row(name: str, etag: str, profile: dict) -> dict:
+    row = {"name": name, "etag": etag}
+    for field in STRING_FIELDS:
+        value = profile.get(field)
+        row[field] = None if value is None else str(value)
+    for field in LIST_FIELDS:
+        value = profile.get(field)
+        row[field] = None if value is None else [str(v) for v in ([value] if isinstance(value, str) else value)]
+    # Champs hors schéma (ex. t_conformite) conservés en JSON
+    extra = {k: v for k, v in profile.items() if k not in STRING_FIELDS and k not in LIST_FIELDS}
+    row["extra"] = json.dumps(extra) if extra else None
+    return row
+
+
+def _profile(row: dict) -> dict:
+    profile = {field: row[field] for field in STRING_FIELDS + LIST_FIELDS if row[field] is not None}
+    if row["extra"]:
+        profile.update(json.loads(row["extra"]))
+    return profile
+
+
+class StoredProfiles:
+    """
+    Contenu du fichier compacté : {nom: ETag du JSON source} lu d'un coup, et le résumé
+    10-K d'une entreprise reconstruit depuis sa ligne Arrow seulement à la demande.
+    """
+
+    def __init__(self, table=None):
+        self.table = table
+        names = [] if table is None else table.column("name").to_pylist()
+        self.etags = dict(zip(names, [] if table is None else table.column("etag").to_pylist()))
+        self.rows = {name: row for row, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.etags)
+
+    def __contains__(self, name) -> bool:
+        return name in self.etags
+
+    def keys(self):
+        return self.etags.keys()
+
+    def etag(self, name: str):
+        return self.etags.get(name)
+
+    def profile(self, name: str) -> dict:
+        return _profile(self.table.slice(self.rows[name], 1).to_pylist()[0])
+
+
+class CompanyProfileStore:
+    """
+    Tous les résumés 10-K dans un seul fichier Arrow (format colonnes, lisible en mémoire
+    mappée), rangé sur S3 sous le préfixe d'état de l'extraction et copié en local. La copie
+    locale n'est retéléchargée que si l'ETag S3 du fichier compacté a changé.
+
+    Seul le batch d'extraction (process_all_fillings) réécrit le fichier, via update() ;
+    le scoring se contente de refresh() et load().
+    """
+
+    def __init__(self, s3_client, bucket: str, prefix: str, directory: str = COMPANY_STORE_DIR):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = f"{prefix.rstrip('/')}/{COMPANY_STORE_FILENAME}"
+        self.directory = directory
+        self.path = os.path.join(directory, COMPANY_STORE_FILENAME)
+        self.etag_path = self.path + ".etag"
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def _local_etag(self):
+        try:
+            with open(self.etag_path, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _write_local_etag(self, etag: str):
+        with open(self.etag_path, "w", encoding="utf-8") as f:
+            f.write(etag)
+
+    def refresh(self) -> bool:
+        """Met à jour la copie locale depuis S3 si besoin. Faux si aucun fichier compacté n'existe."""
+        try:
+            remote_etag = self.s3.head_object(Bucket=self.bucket, Key=self.key)["ETag"]
+        except Exception:
+            return os.path.exists(self.path)
+
+        if remote_etag != self._local_etag() or not os.path.exists(self.path):
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".arrow")
+            os.close(fd)
+            self.s3.download_file(self.bucket, self.key, tmp_path)
+            os.replace(tmp_path, self.path)
+            self._write_local_etag(remote_etag)
+            print(f"📦 Profils des entreprises mis à jour depuis s3://{self.bucket}/{self.key}")
+        return True
+
+    def load(self) -> "StoredProfiles":
+        """
+        Fichier compacté en mémoire mappée : seules les colonnes nom et ETag sont converties
+        d'emblée, chaque résumé n'est construit que quand on le demande.
+        Vide si pyarrow est absent ou si aucun fichier compacté n'existe.
+        """
+        if not self.available or not os.path.exists(self.path):
+            return StoredProfiles()
+        start = time.perf_counter()
+        with pa.memory_map(self.path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        profiles = StoredProfiles(table)
+        print(f"📦 {len(profiles)} profils d'entreprises indexés en {(time.perf_counter() - start) * 1000:.0f} ms")
+        return profiles
+
+    def update(self, entries: dict, load_summary, max_workers: int = 16) -> bool:
+        """
+        Met le fichier compacté en accord avec les résumés présents sur S3. Les lignes dont
+        l'ETag n'a pas changé sont reprises telles quelles, seuls les autres résumés sont relus.
+
+        Args:
+            entries: {nom de l'entreprise: (clé S3 du résumé, ETag)}.
+            load_summary: fonction clé S3 → résumé 10-K (dict).
+
+        Returns:
+            bool: vrai si le fichier a été réécrit.
+        """
+        if not self.available:
+            return False
+        self.refresh()
+        stored = self.load()
+        etags = {name: etag for name, (_, etag) in entries.items()}
+        changed = [name for name, etag in etags.items() if stored.etag(name) != etag]
+        if not changed and not stored.keys() - etags.keys():
+            return False
+
+        profiles = {name: stored.profile(name) for name in etags if name not in changed}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(load_summary, entries[name][0]): name for name in changed}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    profiles[name] = future.result()
+                except Exception as e:
+                    print(f"❌ Erreur sur {name}: {e}")
+                    etags.pop(name)
+
+        self.compact(profiles, etags)
+        return True
+
+    def compact(self, profiles: dict, etags: dict):
+        """
+        Réécrit le fichier compacté (local puis S3).
+
+        Args:
+            profiles: {nom de l'entreprise: résumé 10-K}.
+            etags: {nom: ETag S3 du JSON source}.
+        """
+        if not self.available:
+            return
+        rows = [_row(name, etags.get(name, ""), profile) for name, profile in sorted(profiles.items())]
+        table = pa.Table.from_pylist(rows, schema=_schema())
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".arrow")
+        with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, self.path)
+
+        with open(self.path, "rb") as f:
+            self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=f)
+        self._write_local_etag(self.s3.head_object(Bucket=self.bucket, Key=self.key)["ETag"])
+        print(f"📦 {len(rows)} profils d'entreprises compactés dans s3://{self.bucket}/{self.key}")
@@ -1,21 +1,62 @@
 import boto3
+import heapq
 import instructor
 import json
 import sys
 import os
-import math
+import queue
 from pydantic import BaseModel
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from dataExtractionFromLaw.dataExtractionFromLaw import getLawInformations
+from dataExtractionFrom10K.tokenBudget10K import estimate_tokens
+from concernedEntreprises.preFilter import LawPreFilter
+from concernedEntreprises.similarityIndex import CompanySimilarityIndex
+from concernedEntreprises.companyStore import CompanyProfileStore
+from concernedEntreprises.scoreCache import ScoreCache, content_sha256, score_key
+from concernedEntreprises.rankedScores import RankedScores, temporal_impact
+from llmScheduler.llmScheduler import ScheduledClient
 
 s3 = boto3.client("s3")
 bedrock_client = boto3.client('bedrock-runtime')
-client = instructor.from_bedrock(bedrock_client)
+# Tous les appels passent par l'ordonnanceur partagé (quotas, concurrence adaptative, relances)
+client = ScheduledClient(instructor.from_bedrock(bedrock_client))
 
 BUCKET_NAME = "csv-file-store-ec51f700"
 PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/fillingsResume"
+# Fichiers d'état du batch d'extraction 10-K (dont le fichier compacté des profils)
+STATE_PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/extractionState/fillings"
+
+# Lecture seule ici : le fichier compacté est reconstruit par process_all_fillings
+store = CompanyProfileStore(s3, BUCKET_NAME, STATE_PREFIX)
+score_cache = ScoreCache()
+
+
+SCORE_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+# À incrémenter à chaque modification des prompts de scoring : les scores en cache
+# d'une autre version ne sont plus utilisés
+SCORE_PROMPT_VERSION = 1
+# Lot de scoring : nombre d'entreprises et tokens de profils par requête
+SCORE_BATCH_SIZE = 10
+SCORE_BATCH_TOKENS = 12000
+
+# Barème et critères, communs au scoring unitaire et au scoring par lots
+SCORING_GUIDE = (
+    "Scoring scale:\n"
+    "0 → No impact (law unrelated to company's sector or geography)\n"
+    "1 → Minimal impact (indirect or partial exposure)\n"
+    "2 → Limited impact (only some operations or markets affected)\n"
+    "3 → Moderate impact (noticeable operational or compliance costs)\n"
+    "4 → High impact (affects core business or significant regulatory burden)\n"
+    "5 → Very high impact (fundamental change, major compliance costs, or legal risk)\n\n"
+    "Consider:\n"
+    "- Whether the company operates in countries where the law applies.\n"
+    "- Whether its sectors or sub-sectors are mentioned in the law.\n"
+    "- Whether its risk factors already reference similar regulations.\n"
+    "- Whether the imposed measures directly restrict or burden its activities.\n"
+    "- Whether the law’s effective date aligns with the company’s current operations.\n\n"
+)
 
 
 class Score(BaseModel):
@@ -23,9 +64,19 @@ class Score(BaseModel):
     reasoning: str
 
 
+class CompanyScore(BaseModel):
+    company: str
+    score: int
+    reasoning: str
+
+
+class BatchScores(BaseModel):
+    scores: list[CompanyScore]
+
+
 def getScoreAndReasoning(data: str, law: str) -> Score:
     response = client.chat.completions.create(
-            modelId="anthropic.claude-3-sonnet-20240229-v1:0",
+            modelId=SCORE_MODEL_ID,
             messages=[
                 {
                     "role": "user",
@@ -38,19 +89,7 @@ def getScoreAndReasoning(data: str, law: str) -> Score:
                         "Your goal is to produce two outputs:\n"
                         "- **score** (integer 0–5): a numeric estimate of how strongly the law impacts this company.\n"
                         "- **reasoning** (string): a detailed justification for that score, citing specific matches or mismatches between the law and the company.\n\n"
-                        "Scoring scale:\n"
-                        "0 → No impact (law unrelated to company's sector or geography)\n"
-                        "1 → Minimal impact (indirect or partial exposure)\n"
-                        "2 → Limited impact (only some operations or markets affected)\n"
-                        "3 → Moderate impact (noticeable operational or compliance costs)\n"
-                        "4 → High impact (affects core business or significant regulatory burden)\n"
-                        "5 → Very high impact (fundamental change, major compliance costs, or legal risk)\n\n"
-                        "Consider:\n"
-                        "- Whether the company operates in countries where the law applies.\n"
-                        "- Whether its sectors or sub-sectors are mentioned in the law.\n"
-                        "- Whether its risk factors already reference similar regulations.\n"
-                        "- Whether the imposed measures directly restrict or burden its activities.\n"
-                        "- Whether the law’s effective date aligns with the company’s current operations.\n\n"
+                        + SCORING_GUIDE +
                         "Return your analysis following this schema:\n"
                         "{\n"
                         "  \"score\": <integer between 0 and 5>,\n"
@@ -71,45 +110,170 @@ def getScoreAndReasoning(data: str, law: str) -> Score:
     return {"score": response.score, "reasoning": response.reasoning}
 
 
-def getConcernedEntreprises(law_summarized, entreprises_path: str, investment_horizon, max_workers: int = 7) -> dict:
-    Alpha = 1 #court terme
-    Beta = 0.8
-    Gama = 0.06
-    t_eff = 6 - law_summarized.time_before_application
-    if (investment_horizon == "Moyen terme"):
-        Beta = 0.535
-        Gama = 0.06
-        t_eff = 24 - law_summarized.time_before_application
-    elif (investment_horizon == "Long terme"):
-        Beta = 0.4
-        Gama = 0.1
-        t_eff = 60 - law_summarized.time_before_application
+def compact_profile(data: dict) -> str:
+    """Profil 10-K en JSON compact, sans les champs vides."""
+    return json.dumps({k: v for k, v in data.items() if v not in (None, "", [], {})}, separators=(",", ":"))
+
+
+def batch_companies(profiles: dict, token_budget: int = SCORE_BATCH_TOKENS, max_size: int = SCORE_BATCH_SIZE) -> list[dict]:
+    """Découpe {nom: profil compact} en lots limités en nombre d'entreprises et en tokens."""
+    batches, current, current_tokens = [], {}, 0
+    for name, profile in profiles.items():
+        tokens = estimate_tokens(profile)
+        if current and (len(current) >= max_size or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = {}, 0
+        current[name] = profile
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
 
-    if (t_eff < 0): t_eff = 0
+def getBatchScoresAndReasoning(profiles: dict, law: str) -> dict:
+    """
+    Score de plusieurs entreprises pour une même loi en une seule requête : la loi et les
+    consignes ne sont envoyées qu'une fois, suivies des profils compacts.
+
+    Args:
+        profiles: {nom de l'entreprise: profil 10-K en JSON compact}.
+        law: résumé de la loi en JSON.
+
+    Returns:
+        {nom: {"score", "reasoning"}}. Une entreprise absente ou mal notée dans la réponse
+        du lot est rescorée seule avec getScoreAndReasoning.
+    """
+    companies = "\n\n".join(f"### {name}\n{profile}" for name, profile in profiles.items())
+    try:
+        response = client.chat.completions.create(
+            modelId=SCORE_MODEL_ID,
+            messages=[
+                {
+                    "role": "user",
+                    "content": (
+                        "You are an expert in corporate regulatory analysis.\n"
+                        "Your task is to assess how much a **new law or directive** impacts each of several companies.\n\n"
+                        f"--- LAW DATA ---\n{law}\n\n"
+                        "You will then receive the **10-K summaries** of several companies, each introduced by "
+                        "`### <company>`, describing its business model, sectors, countries of operation, and risk factors.\n\n"
+                        "For **every** company, produce:\n"
+                        "- **company** (string): the company name exactly as given after `###`.\n"
+                        "- **score** (integer 0–5): a numeric estimate of how strongly the law impacts this company.\n"
+                        "- **reasoning** (string): a justification for that score, citing specific matches or mismatches between the law and the company (1 sentence).\n\n"
+                        + SCORING_GUIDE +
+                        "Score each company independently. Return one entry per company in the `scores` list.\n\n"
+                        f"--- COMPANIES ---\n{companies}"
+                    ),
+                },
+            ],
+            response_model=BatchScores,
+            inferenceConfig={
+                "maxTokens": 4096,
+            }
+        )
+        scores = {
+            item.company.strip(): {"score": item.score, "reasoning": item.reasoning}
+            for item in response.scores
+            if 0 <= item.score <= 5
+        }
+    except Exception as e:
+        print(f"⚠️ Lot de {len(profiles)} entreprises en échec, scoring unitaire : {e}")
+        scores = {}
 
-    def temporal_impact(Alpha, Beta, Gama, t_eff, t_conformite, revision_probability):
+    results = {name: scores[name] for name in profiles if name in scores}
+    for name in profiles.keys() - results.keys():
         try:
-            return Alpha * math.exp(
-                -Beta * ((t_eff) / (t_conformite))
-            ) + Gama * revision_probability
-        except ZeroDivisionError:
-            return 0
-    
-    response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=PREFIX)
-
-    if "Contents" not in response:
-        print("Aucun fichier trouvé dans ce chemin S3.")
-        return {}
+            results[name] = getScoreAndReasoning(profiles[name], law)
+        except Exception as e:
+            print(f"❌ Erreur sur {name}: {e}")
+    return results
+
+
+def iterCompanyKeys(prefix: str = PREFIX):
+    """
+    Résumés 10-K présents sur S3, page par page (1000 clés par page) : les clés arrivent
+    au fil de la pagination, sans limite sur le nombre total de dépôts.
+
+    Yields:
+        (nom de l'entreprise, clé S3, ETag)
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            # Anciens _checkpoint.json / _manifest.json, écrits ici avant STATE_PREFIX : pas des entreprises
+            if obj["Key"].endswith(".json") and not os.path.basename(obj["Key"]).startswith("_"):
+                yield os.path.dirname(obj["Key"]).split('/')[-1], obj["Key"], obj["ETag"]
+
+
+def loadCompanySummary(key: str) -> dict:
+    body = s3.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read().decode("utf-8")
+    return json.loads(body)
 
+
+class LiveTopK:
+    """Les k meilleurs score_final vus jusqu'ici : tas min de taille k, mis à jour en O(log k)."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap = []
+
+    def push(self, name: str, result: dict) -> bool:
+        """Ajoute un résultat ; vrai si le top k a changé."""
+        if self.k <= 0 or "score_final" not in result:
+            return False
+        entry = (result["score_final"], name)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+            return True
+        if entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+            return True
+        return False
+
+    def names(self) -> list[str]:
+        return [name for _, name in sorted(self.heap, reverse=True)]
+
+
+def iterConcernedEntreprises(law_summarized, entreprises_path: str, investment_horizon, max_workers: int = 32,
+                             top_k: int = 0, live_top: int = 10):
+    """
+    Variante en flux de getConcernedEntreprises : chaque entreprise est renvoyée dès que
+    son score est connu, avec le top `live_top` courant.
+
+    Par défaut toutes les entreprises passent par le pré-filtre puis le modèle. Avec
+    `top_k` > 0, seules les `top_k` plus proches de la loi dans l'index de similarité sont
+    scorées ; les autres sont renvoyées à part, sans score ({"shortlisted": False}).
+
+    Yields:
+        (nom de l'entreprise, résultat, top courant [(nom, résultat)] trié par score_final décroissant)
+    """
+    def law_temporal_impact(t_conformite):
+        return float(temporal_impact(
+            investment_horizon, law_summarized.time_before_application, law_summarized.revision_probability, t_conformite
+        ))
+
+    # Un résumé par entreprise : nom du dossier → clé S3 et ETag
+    keys, etags = {}, {}
+    summaries = {}
+    downloads = {}
     results = {}
+    live = LiveTopK(live_top)
+    law_json = law_summarized.model_dump_json()
+    law_hash = content_sha256(law_summarized.model_dump())
+    # Pays et secteurs de la loi normalisés une seule fois pour toutes les entreprises
+    law_filter = LawPreFilter(law_summarized)
 
     def process_company(key):
         """Fonction exécutée dans chaque thread"""
         folder_name = os.path.dirname(key).split('/')[-1]
         try:
-            file_obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
-            file_content = file_obj["Body"].read().decode("utf-8")
-            data = json.loads(file_content)
+            data = summaries.get(folder_name)
+            if data is None and folder_name in downloads:
+                data = downloads[folder_name].result()
+            if data is None and stored_is_current(folder_name):
+                data = stored.profile(folder_name)
+            if data is None:
+                data = loadCompanySummary(key)
 
             # ⚠️ Assure-toi que data contient t_conformite
             try:
@@ -118,46 +282,200 @@ def getConcernedEntreprises(law_summarized, entreprises_path: str, investment_ho
                 t_conformite = 1
                 print(e)
 
-            # Calcul du score via Bedrock
-            result = getScoreAndReasoning(json.dumps(data), law_summarized.model_dump_json())
+            temporial = law_temporal_impact(t_conformite)
 
-            # Score final pondéré
-            score = result["score"]
-            temporial = temporal_impact(Alpha, Beta, Gama, t_eff, t_conformite, law_summarized.revision_probability)
-            score_final = score * temporial
+            # Aucun pays ou secteur commun : score nul sans appel au modèle
+            relevant, reason = law_filter.check(data)
+            if not relevant:
+                return folder_name, {
+                    "score": 0,
+                    "t_conformite": t_conformite,
+                    "impact_temporiel": temporial,
+                    "score_final": 0,
+                    "reasoning": reason,
+                    "prefiltered": True,
+                }
 
+            # Entreprise retenue : scorée ensuite par lots, sauf si le cache connaît déjà ce couple
             return folder_name, {
-                "score": score,
+                "t_conformite": t_conformite,
                 "impact_temporiel": temporial,
-                "score_final": score_final,
+                "profile": compact_profile(data),
+                "cache_key": score_key(content_sha256(data), law_hash, SCORE_MODEL_ID, SCORE_PROMPT_VERSION),
             }
 
         except Exception as e:
             print(f"❌ Erreur sur {folder_name}: {e}")
             return folder_name, {"error": str(e)}
 
-    # --- Thread pool
+    def stored_is_current(folder_name):
+        return folder_name in stored and stored.etag(folder_name) == etags.get(folder_name)
+
+    def all_summaries():
+        """Tous les résumés connus ; ceux du fichier compacté ne sont construits qu'ici, si besoin"""
+        return {
+            name: summaries[name] if name in summaries else stored.profile(name)
+            for name in etags if name in summaries or stored_is_current(name)
+        }
+
+    def record(name, result):
+        results[name] = result
+        live.push(name, result)
+        return name, result, [(top_name, results[top_name]) for top_name in live.names()]
+
+    def final_result(score, item):
+        return {
+            "score": score,
+            "t_conformite": item["t_conformite"],
+            "impact_temporiel": item["impact_temporiel"],
+            "score_final": score * item["impact_temporiel"],
+        }
+
+    def score_batch(batch):
+        """Calcul des scores d'un lot via Bedrock, puis score final pondéré"""
+        try:
+            scores = getBatchScoresAndReasoning({name: item["profile"] for name, item in batch.items()}, law_json)
+        except Exception as e:
+            print(f"❌ Erreur sur un lot de {len(batch)} entreprises: {e}")
+            return {name: {"error": str(e)} for name in batch}
+        score_cache.put_many({batch[name]["cache_key"]: scores[name] for name in scores if name in batch})
+
+        batch_results = {}
+        for name, item in batch.items():
+            if name not in scores:
+                batch_results[name] = {"error": "Score manquant"}
+                continue
+            batch_results[name] = final_result(scores[name]["score"], item)
+        return batch_results
+
+    def listed_companies():
+        """Toutes les entreprises, au fil des pages de la liste S3"""
+        for folder_name, key, etag in iterCompanyKeys():
+            keys[folder_name] = key
+            etags[folder_name] = etag
+            yield folder_name, key
+
+    def shortlisted_companies(executor):
+        """Les top_k entreprises les plus proches de la loi : liste S3 complète et index d'abord"""
+        index = CompanySimilarityIndex.load()
+        for _ in listed_companies():
+            pass
+        if keys and (index is None or not index.is_current(etags)):
+            # Index de similarité local, reconstruit seulement si un résumé a changé
+            for folder_name in keys:
+                if not stored_is_current(folder_name):
+                    downloads[folder_name] = executor.submit(loadCompanySummary, keys[folder_name])
+            for folder_name, future in downloads.items():
+                try:
+                    summaries[folder_name] = future.result()
+                except Exception as e:
+                    print(f"❌ Erreur sur {folder_name}: {e}")
+                    etags.pop(folder_name)
+            index = CompanySimilarityIndex.build(all_summaries(), etags)
+        for folder_name, _ in (index.shortlist(law_summarized, top_k) if keys else []):
+            if folder_name in keys:
+                yield folder_name, keys[folder_name]
+
+    # Univers compacté par le batch d'extraction : une seule lecture au lieu d'un GET par entreprise
+    store.refresh()
+    stored = store.load()
+
+    # Tâches terminées (entreprises ou lots), dans l'ordre où elles se terminent
+    done = queue.SimpleQueue()
+    in_flight = {"companies": 0, "batches": 0}
+    pending = {}
+    cached_count = 0
+    scored_count = 0
+
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(process_company, obj["Key"])
-            for obj in response["Contents"]
-            if obj["Key"].endswith(".json")
-        ]
+        def submit(kind, fn, *args):
+            in_flight[kind] += 1
+            executor.submit(fn, *args).add_done_callback(lambda future: done.put((kind, future)))
 
-        for future in as_completed(futures):
+        def submit_batches():
+            """Soumet les lots en attente ; renvoie les résultats déjà connus du cache"""
+            nonlocal cached_count, scored_count
+            cached = score_cache.get_many([item["cache_key"] for item in pending.values()])
+            from_cache = {}
+            for name in list(pending):
+                if pending[name]["cache_key"] in cached:
+                    from_cache[name] = final_result(cached[pending[name]["cache_key"]]["score"], pending.pop(name))
+            cached_count += len(from_cache)
+            scored_count += len(pending)
+            for batch in batch_companies({name: item["profile"] for name, item in pending.items()}):
+                submit("batches", score_batch, {name: pending[name] for name in batch})
+            pending.clear()
+            return from_cache
+
+        def handle(kind, future):
+            """Résultats d'une tâche terminée ; une entreprise retenue attend que son lot soit plein"""
+            in_flight[kind] -= 1
+            if kind == "batches":
+                for name, result in future.result().items():
+                    yield record(name, result)
+                return
             folder_name, result = future.result()
-            results[folder_name] = result
+            if "profile" not in result:
+                yield record(folder_name, result)
+                return
+            pending[folder_name] = result
+            if len(pending) >= SCORE_BATCH_SIZE:
+                for name, cached_result in submit_batches().items():
+                    yield record(name, cached_result)
 
-    # Tri des résultats par score_final décroissant
-    sorted_results = sorted(
-            results.items(),
-            key=lambda item: item[1].get("score_final", 0),
-            reverse=True,
-        )
-    
+        # Le scoring commence dès la première page de la liste S3 (ou dès la présélection faite),
+        # et les résultats prêts sont renvoyés sans attendre la fin de la liste
+        for folder_name, key in (shortlisted_companies(executor) if top_k else listed_companies()):
+            submit("companies", process_company, key)
+            while not done.empty():
+                yield from handle(*done.get())
+
+        if not keys:
+            print("Aucun fichier trouvé dans ce chemin S3.")
+            return
+
+        while True:
+            if in_flight["companies"] == 0 and pending:
+                for name, cached_result in submit_batches().items():
+                    yield record(name, cached_result)
+            if not in_flight["companies"] and not in_flight["batches"]:
+                break
+            yield from handle(*done.get())
+
+    prefiltered = sum(1 for r in results.values() if r.get("prefiltered"))
+    print(f"🔎 {len(results)} entreprises : {prefiltered} exclues par le pré-filtre, "
+          f"{cached_count} scores repris du cache, {scored_count} envoyées au modèle")
+
+    # Hors présélection : pas de score (et pas de 0 mêlé aux vrais scores), groupe à part
+    for folder_name in keys:
+        if folder_name not in results:
+            yield record(folder_name, {
+                "reasoning": "Hors présélection : résumé peu similaire à la loi, non scoré.",
+                "shortlisted": False,
+            })
+
+
+def rankConcernedEntreprises(results: dict, law_summarized) -> RankedScores:
+    """Résultats {entreprise: résultat} → tableau compact, reclassable par horizon sans rescorer."""
+    return RankedScores.from_results(
+        results, law_summarized.time_before_application, law_summarized.revision_probability
+    )
+
+
+def getConcernedEntreprises(law_summarized, entreprises_path: str, investment_horizon, max_workers: int = 32,
+                            top_k: int = 0) -> tuple[RankedScores, RankedScores]:
+    results = {}
+    for folder_name, result, _ in iterConcernedEntreprises(
+        law_summarized, entreprises_path, investment_horizon, max_workers, top_k, live_top=0
+    ):
+        results[folder_name] = result
+
+    if not results:
+        return RankedScores.empty(), RankedScores.empty()
 
-    return dict(sorted_results[:100]), dict(sorted_results)
-    #  change to a 100          ^
+    # Top 100 par tas (O(n log k)), vue sur le même tableau que l'ensemble des résultats
+    ranked = rankConcernedEntreprises(results, law_summarized)
+    return ranked.top(100), ranked
 
 if __name__ == "__main__":
     law_sum = getLawInformations("csv-file-store-ec51f700", "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/directives/1.DIRECTIVE (UE) 20192161 DU PARLEMENT EUROPÉEN ET DU CONSEIL.html")
@@ -0,0 +1,223 @@
+import re
+import unicodedata
+
+# Pays de l'Union européenne (noms normalisés)
+EU_COUNTRIES = {
+    "austria", "belgium", "bulgaria", "croatia", "cyprus", "czech republic", "denmark", "estonia",
+    "finland", "france", "germany", "greece", "hungary", "ireland", "italy", "latvia", "lithuania",
+    "luxembourg", "malta", "netherlands", "poland", "portugal", "romania", "slovakia", "slovenia",
+    "spain", "sweden",
+}
+
+# Régions → pays couverts (noms normalisés)
+REGIONS = {
+    "european union": EU_COUNTRIES,
+    "eu": EU_COUNTRIES,
+    "eu member states": EU_COUNTRIES,
+    "member states": EU_COUNTRIES,
+    "eea": EU_COUNTRIES | {"norway", "iceland", "liechtenstein"},
+    "european economic area": EU_COUNTRIES | {"norway", "iceland", "liechtenstein"},
+    "europe": EU_COUNTRIES | {"united kingdom", "switzerland", "norway", "iceland", "liechtenstein"},
+    "emea": EU_COUNTRIES | {"united kingdom", "switzerland", "norway", "united arab emirates", "saudi arabia",
+                            "israel", "south africa", "turkey", "egypt"},
+    "north america": {"united states", "canada", "mexico"},
+    "americas": {"united states", "canada", "mexico", "brazil", "argentina", "chile", "colombia", "peru"},
+    "latin america": {"mexico", "brazil", "argentina", "chile", "colombia", "peru"},
+    "asia": {"china", "japan", "south korea", "india", "taiwan", "singapore", "hong kong", "indonesia",
+             "malaysia", "thailand", "vietnam", "philippines"},
+    "asia pacific": {"china", "japan", "south korea", "india", "taiwan", "singapore", "hong kong", "australia",
+                     "new zealand", "indonesia", "malaysia", "thailand", "vietnam", "philippines"},
+    "apac": {"china", "japan", "south korea", "india", "taiwan", "singapore", "hong kong", "australia",
+             "new zealand", "indonesia", "malaysia", "thailand", "vietnam", "philippines"},
+    "greater china": {"china", "hong kong", "taiwan", "macau"},
+    "rest of asia pacific": {"south korea", "india", "singapore", "australia", "new zealand", "indonesia",
+                             "malaysia", "thailand", "vietnam", "philippines"},
+}
+
+COUNTRY_ALIASES = {
+    "us": "united states", "u s": "united states", "usa": "united states", "u s a": "united states",
+    "united states of america": "united states", "america": "united states",
+    "uk": "united kingdom", "u k": "united kingdom", "great britain": "united kingdom", "britain": "united kingdom",
+    "england": "united kingdom",
+    "prc": "china", "people s republic of china": "china", "mainland china": "china",
+    "korea": "south korea", "republic of korea": "south korea",
+    "czechia": "czech republic", "holland": "netherlands", "the netherlands": "netherlands",
+    "deutschland": "germany", "espana": "spain", "italia": "italy", "uae": "united arab emirates",
+}
+
+# Termes qui couvrent tous les pays / tous les secteurs
+GLOBAL_TERMS = {"global", "worldwide", "international", "all countries", "world", "rest of world", "other countries"}
+ALL_SECTORS_TERMS = {"all", "all sectors", "any", "general", "cross sector", "all industries", "economy",
+                     "all companies", "all undertakings", "all businesses"}
+
+# Familles de secteurs : racines de mots (en minuscules) qui les signalent
+SECTOR_FAMILIES = {
+    "energy": ["energ", "oil", "gas", "petrol", "electric", "power", "utilit", "renewable", "solar", "wind",
+               "nuclear", "coal", "fuel", "hydrogen"],
+    "finance": ["financ", "bank", "insur", "invest", "asset manag", "credit", "payment", "fintech", "capital market",
+                "securit", "crypto"],
+    "technology": ["tech", "software", "digital", "internet", "cloud", "data", "comput", "semiconductor",
+                   "electronic", "telecom", "artificial intelligence", "ai ", "platform", "online", "cyber"],
+    "health": ["health", "pharma", "medic", "biotech", "hospital", "drug", "life science"],
+    "consumer": ["consumer", "retail", "e commerce", "ecommerce", "apparel", "food", "beverage", "cosmetic",
+                 "household", "restaurant", "luxury"],
+    "industrials": ["industr", "manufactur", "machiner", "aerospace", "defen", "construct", "engineer",
+                    "chemical", "steel", "metal", "material", "mining", "packag"],
+    "transport": ["transport", "automotive", "vehicle", "car ", "airline", "aviation", "shipping", "logistic",
+                  "rail", "freight", "mobility"],
+    "real_estate": ["real estate", "property", "building", "housing", "reit"],
+    "agriculture": ["agricultur", "farm", "forest", "fish", "agri", "crop", "livestock"],
+    "media": ["media", "entertainment", "advertis", "publish", "broadcast", "gaming", "streaming"],
+}
+# Mots trop génériques pour qu'un recouvrement suffise
+SECTOR_STOPWORDS = {"services", "service", "products", "product", "industry", "industries", "sector", "sectors",
+                    "companies", "company", "other", "and", "the", "for", "general", "activities", "market",
+                    "markets", "solutions", "goods"}
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+_PARENTHESES_RE = re.compile(r"\(([^()]*)\)")
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def normalize_term(term: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces réduits."""
+    term = unicodedata.normalize("NFKD", str(term))
+    term = "".join(c for c in term if not unicodedata.combining(c)).casefold()
+    term = _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", term)).strip()
+    return term[4:] if term.startswith("the ") else term
+
+
+def term_variants(term: str) -> list[str]:
+    """
+    Formes normalisées d'un terme : le terme sans ses parenthèses, puis le contenu de
+    chaque parenthèse ("China (PRC)" → ["china", "prc"]).
+    """
+    term = str(term)
+    variants = [normalize_term(_PARENTHESES_RE.sub(" ", term))]
+    variants += [normalize_term(inner) for inner in _PARENTHESES_RE.findall(term)]
+    return [v for v in variants if v]
+
+
+# Noms de pays connus (normalisés), pour reconnaître un pays cité dans une expression plus longue
+KNOWN_COUNTRIES = set(EU_COUNTRIES).union(*REGIONS.values(), COUNTRY_ALIASES.values(), {
+    "russia", "ukraine", "serbia", "morocco", "nigeria", "kenya", "qatar", "kuwait", "pakistan", "bangladesh",
+})
+# Plus longs d'abord : "south korea" avant "korea", "european union" avant "eu"
+_COUNTRY_VOCABULARY = sorted(set(REGIONS) | set(COUNTRY_ALIASES) | KNOWN_COUNTRIES | GLOBAL_TERMS,
+                             key=len, reverse=True)
+
+
+def _resolve_country(term: str):
+    """Pays couverts par un terme normalisé, "*" pour le monde entier ; None si rien n'est reconnu."""
+    if term in GLOBAL_TERMS:
+        return {"*"}
+    if term in REGIONS:
+        return REGIONS[term] | {term}
+    if term in COUNTRY_ALIASES or term in KNOWN_COUNTRIES:
+        return {COUNTRY_ALIASES.get(term, term)}
+
+    # Expression plus longue ("all eu member states", "eu 27") : pays et régions cités mot pour mot
+    countries = set()
+    padded = f" {term} "
+    for name in _COUNTRY_VOCABULARY:
+        if f" {name} " in padded:
+            countries |= _resolve_country(name)
+            padded = padded.replace(f" {name} ", " | ")
+    return countries or None
+
+
+def resolve_countries(terms) -> tuple[set, list]:
+    """(pays normalisés reconnus, termes non reconnus) ; "*" si un terme couvre le monde entier."""
+    countries = set()
+    unknown = []
+    for term in _as_list(terms):
+        resolved = [_resolve_country(v) for v in term_variants(term)]
+        resolved = [r for r in resolved if r]
+        if resolved:
+            countries |= set().union(*resolved)
+        elif term_variants(term):
+            unknown.append(term)
+    return countries, unknown
+
+
+def country_set(terms) -> set:
+    """Ensemble de pays normalisés ; les termes non reconnus sont gardés tels quels."""
+    countries, unknown = resolve_countries(terms)
+    for term in unknown:
+        countries.add(term_variants(term)[0])
+    return countries
+
+
+def _term_families(term: str) -> set:
+    if term in ALL_SECTORS_TERMS:
+        return {"*"}
+    padded = f" {term} "
+    return {family for family, stems in SECTOR_FAMILIES.items() if any(stem in padded for stem in stems)}
+
+
+def resolve_sectors(terms) -> tuple[set, set, list]:
+    """(familles de secteurs, mots significatifs, termes sans famille) ; familles = {"*"} pour "tous secteurs"."""
+    families = set()
+    words = set()
+    unknown = []
+    for term in _as_list(terms):
+        variants = term_variants(term)
+        if not variants:
+            continue
+        term_families = set().union(*(_term_families(v) for v in variants))
+        if not term_families:
+            unknown.append(term)
+        families |= term_families
+        if "*" not in term_families:
+            words |= {w for v in variants for w in v.split() if len(w) >= 4 and w not in SECTOR_STOPWORDS}
+    return families, words, unknown
+
+
+def sector_profile(terms) -> tuple[set, set]:
+    """(familles de secteurs, mots significatifs) ; familles = {"*"} pour "tous secteurs"."""
+    families, words, _ = resolve_sectors(terms)
+    return families, words
+
+
+class LawPreFilter:
+    """
+    Pré-filtre local d'une loi : une entreprise n'est envoyée au modèle que si elle partage
+    au moins un pays et un secteur avec la loi (vocabulaires normalisés, régions développées
+    en pays, familles de secteurs). Le filtre ne doit exclure que ce qu'il comprend : une loi
+    sans pays ou sans secteur, ou dont un terme n'est pas reconnu (ex. "Listed companies",
+    "Companies with more than 250 employees"), ne filtre pas sur ce critère.
+    """
+
+    def __init__(self, law):
+        self.countries, self.unknown_countries = resolve_countries(law.countrys)
+        self.sector_families, self.sector_words, self.unknown_sectors = resolve_sectors(law.sectors_of_activity)
+
+    def _country_match(self, company: dict) -> bool:
+        if not self.countries or "*" in self.countries or self.unknown_countries:
+            return True
+        company_countries = country_set(
+            _as_list(company.get("country_of_operation"))
+            + _as_list(company.get("country_headquarters"))
+            + _as_list(company.get("client_country"))
+        )
+        return "*" in company_countries or bool(self.countries & company_countries)
+
+    def _sector_match(self, company: dict) -> bool:
+        if not self.sector_families or "*" in self.sector_families or self.unknown_sectors:
+            return True
+        families, words = sector_profile(_as_list(company.get("sector")) + _as_list(company.get("sub_sector")))
+        return bool(self.sector_families & families) or bool(self.sector_words & words)
+
+    def check(self, company: dict) -> tuple[bool, str]:
+        """(à scorer par le modèle ?, raison de l'exclusion sinon)"""
+        if not self._country_match(company):
+            return False, "Pré-filtre : aucun pays d'activité commun avec la loi."
+        if not self._sector_match(company):
+            return False, "Pré-filtre : aucun secteur d'activité commun avec la loi."
+        return True, ""
@@ -0,0 +1,190 @@
+import heapq
+import numpy as np
+
+# Horizon d'investissement → (Alpha, Beta, Gama, mois de l'horizon)
+HORIZON_PARAMETERS = {
+    "Court terme": (1, 0.8, 0.06, 6),
+    "Moyen terme": (1, 0.535, 0.06, 24),
+    "Long terme": (1, 0.4, 0.1, 60),
+}
+
+# Drapeaux d'une ligne de résultat
+PREFILTERED = 1
+OUT_OF_SHORTLIST = 2
+ERROR = 4
+
+
+def temporal_impact(investment_horizon, time_before_application, revision_probability, t_conformite):
+    """
+    Impact temporel Alpha * exp(-Beta * t_eff / t_conformite) + Gama * revision_probability,
+    avec t_eff = horizon - délai avant application (borné à 0). Vectorisé sur t_conformite ;
+    0 quand t_conformite vaut 0.
+    """
+    Alpha, Beta, Gama, months = HORIZON_PARAMETERS.get(investment_horizon, HORIZON_PARAMETERS["Court terme"])
+    t_eff = max(months - time_before_application, 0)
+    t_conformite = np.asarray(t_conformite, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        impact = Alpha * np.exp(-Beta * (t_eff / t_conformite)) + Gama * revision_probability
+    return np.where(t_conformite == 0, 0.0, impact)
+
+
+def top_indices(values: np.ndarray, k: int) -> list[int]:
+    """Indices des k plus grandes valeurs, par ordre décroissant : tas de taille k, O(n log k)."""
+    return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+
+
+class RankedScores:
+    """
+    Résultats du scoring d'une loi sur toutes les entreprises, dans un tableau structuré
+    NumPy (une ligne par entreprise) plutôt qu'un dict de dicts. Se lit comme un dict
+    {entreprise: {"score", "impact_temporiel", "score_final", ...}} parcouru par
+    score_final décroissant ; top(k) renvoie une vue, sans copie des lignes.
+    Les entreprises hors présélection, jamais scorées, ne font pas partie du classement :
+    elles restent accessibles par leur nom et listées par unscored().
+    Les raisons textuelles (pré-filtre, erreurs) sont gardées à part, seulement quand elles existent.
+    """
+
+    def __init__(self, records: np.ndarray, law_parameters: tuple, reasons: dict, order: np.ndarray = None):
+        self.records = records
+        self.law_parameters = law_parameters
+        self.reasons = reasons
+        self._order = order
+        self._members = None if order is None else set(order.tolist())
+        self._positions = None
+
+    @staticmethod
+    def dtype(ticker_length: int) -> np.dtype:
+        return np.dtype([
+            ("ticker", f"U{max(ticker_length, 1)}"),
+            ("score", np.int8),
+            ("t_conformite", np.float32),
+            ("impact_temporiel", np.float64),
+            ("score_final", np.float64),
+            ("flags", np.uint8),
+        ])
+
+    @classmethod
+    def from_results(cls, results: dict, time_before_application: int, revision_probability: float):
+        """Construit le tableau depuis {entreprise: résultat} (format de iterConcernedEntreprises)."""
+        records = np.zeros(len(results), dtype=cls.dtype(max(map(len, results), default=1)))
+        reasons = {}
+        for row, (ticker, result) in enumerate(results.items()):
+            flags = 0
+            if result.get("prefiltered"):
+                flags |= PREFILTERED
+            if result.get("shortlisted") is False:
+                flags |= OUT_OF_SHORTLIST
+            if "error" in result:
+                flags |= ERROR
+                reasons[ticker] = result["error"]
+            elif result.get("reasoning"):
+                reasons[ticker] = result["reasoning"]
+            records[row] = (
+                ticker, result.get("score", 0), result.get("t_conformite", 1),
+                result.get("impact_temporiel", 0.0), result.get("score_final", 0.0), flags,
+            )
+        return cls(records, (time_before_application, revision_probability), reasons)
+
+    @classmethod
+    def empty(cls):
+        """Classement vide (aucune entreprise trouvée)."""
+        return cls(np.zeros(0, dtype=cls.dtype(1)), (0, 0.0), {})
+
+    def _scored_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.records["flags"] & OUT_OF_SHORTLIST == 0)
+
+    @property
+    def order(self) -> np.ndarray:
+        """Lignes scorées par score_final décroissant (calculé une seule fois)."""
+        if self._order is None:
+            rows = self._scored_rows()
+            self._order = rows[np.argsort(-self.records["score_final"][rows], kind="stable")]
+        return self._order
+
+    def top(self, k: int) -> "RankedScores":
+        """Les k meilleures entreprises, partageant le même tableau."""
+        if self._order is not None:
+            order = self._order[:k]
+        else:
+            rows = self._scored_rows()
+            order = rows[top_indices(self.records["score_final"][rows], k)]
+        return RankedScores(self.records, self.law_parameters, self.reasons, order)
+
+    def unscored(self) -> list[str]:
+        """Entreprises hors présélection, non scorées et absentes du classement."""
+        return [str(t) for t in self.records["ticker"][self.records["flags"] & OUT_OF_SHORTLIST != 0]]
+
+    def rerank(self, investment_horizon: str) -> "RankedScores":
+        """
+        Nouveau classement pour un autre horizon d'investissement, sans rescorer : seul
+        l'impact temporel est recalculé, d'un seul coup pour toutes les entreprises.
+        """
+        records = self.records.copy()
+        records["impact_temporiel"] = temporal_impact(investment_horizon, *self.law_parameters, records["t_conformite"])
+        records["score_final"] = records["score"] * records["impact_temporiel"]
+        records["score_final"][records["flags"] & ERROR != 0] = 0.0
+        return RankedScores(records, self.law_parameters, self.reasons)
+
+    # --- Interface dict, pour app.py et functions.py ---
+    def _position(self, ticker: str) -> int:
+        if self._positions is None:
+            self._positions = {str(t): i for i, t in enumerate(self.records["ticker"])}
+        row = self._positions[ticker]
+        if self._members is not None and row not in self._members:
+            raise KeyError(ticker)
+        return row
+
+    def _as_dict(self, row: int) -> dict:
+        record = self.records[row]
+        ticker = str(record["ticker"])
+        if record["flags"] & ERROR:
+            return {"error": self.reasons.get(ticker, "")}
+        if record["flags"] & OUT_OF_SHORTLIST:
+            return {"reasoning": self.reasons.get(ticker, ""), "shortlisted": False}
+        result = {
+            "score": int(record["score"]),
+            "impact_temporiel": float(record["impact_temporiel"]),
+            "score_final": float(record["score_final"]),
+        }
+        if ticker in self.reasons:
+            result["reasoning"] = self.reasons[ticker]
+        if record["flags"] & PREFILTERED:
+            result["prefiltered"] = True
+        return result
+
+    def __getitem__(self, ticker: str) -> dict:
+        return self._as_dict(self._position(ticker))
+
+    def get(self, ticker: str, default=None):
+        try:
+            return self[ticker]
+        except KeyError:
+            return default
+
+    def __contains__(self, ticker) -> bool:
+        try:
+            self._position(ticker)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def keys(self) -> list[str]:
+        return [str(t) for t in self.records["ticker"][self.order]]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def values(self) -> list[dict]:
+        return [self._as_dict(row) for row in self.order]
+
+    def items(self) -> list[tuple[str, dict]]:
+        return [(str(self.records["ticker"][row]), self._as_dict(row)) for row in self.order]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sqliteCache.sqliteCache import SqliteLRUCache
+
+SCORE_CACHE_PATH = os.environ.get("SCORE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "scoreCache.sqlite"))
+# Un score est rejoué pendant 30 jours au plus, et on garde au plus MAX_ENTRIES scores
+SCORE_CACHE_TTL_SECONDS = int(os.environ.get("SCORE_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+MAX_ENTRIES = 200_000
+
+
+def content_sha256(document: dict) -> str:
+    """Hash d'un document JSON indépendant de l'ordre des clés et des champs vides."""
+    canonical = json.dumps(
+        {k: v for k, v in document.items() if v not in (None, "", [], {})},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def score_key(company_hash: str, law_hash: str, model_id: str, prompt_version: int) -> str:
+    return hashlib.sha256(f"{model_id}|v{prompt_version}|{company_hash}|{law_hash}".encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Cache persistant des scores (entreprise, loi) : hash du résumé 10-K, hash du résumé
+    de la loi, modèle et version du prompt → {"score", "reasoning"}. SQLite sur disque ;
+    les entrées plus vieilles que `ttl_seconds` sont ignorées puis supprimées, et au-delà
+    de `max_entries` les moins récemment utilisées partent en premier.
+    """
+
+    def __init__(self, path: str = SCORE_CACHE_PATH, ttl_seconds: int = SCORE_CACHE_TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store = SqliteLRUCache(
+            path, "scores", {"score": "INTEGER NOT NULL", "reasoning": "TEXT NOT NULL"}, max_entries,
+            ttl_seconds=ttl_seconds,
+        )
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Scores connus et encore valides : {clé: {"score", "reasoning"}}."""
+        return {
+            key: {"score": score, "reasoning": reasoning}
+            for key, (score, reasoning) in self.store.get_many(keys).items()
+        }
+
+    def put_many(self, scores: dict):
+        """Enregistre {clé: {"score", "reasoning"}} puis applique TTL et limite de taille."""
+        self.store.put_many({key: (value["score"], value["reasoning"]) for key, value in scores.items()})
+
+    def clear(self):
+        self.store.clear()
+
+    def __len__(self):
+        return len(self.store)
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from concernedEntreprises.preFilter import SECTOR_STOPWORDS, _as_list, country_set, normalize_term, sector_profile
+
+SIMILARITY_INDEX_DIR = os.environ.get(
+    "SIMILARITY_INDEX_DIR", os.path.join(tempfile.gettempdir(), "companySimilarityIndex")
+)
+INDEX_VERSION = 2
+# Dimension des vecteurs (hashing trick) : 2**14 float32 = 64 Ko par entreprise
+N_FEATURES = 2 ** 14
+
+# Poids de chaque champ du résumé 10-K dans le vecteur de l'entreprise
+COMPANY_FIELD_WEIGHTS = {
+    "sector": 3.0,
+    "sub_sector": 3.0,
+    "business_resume": 1.0,
+    "business_model": 1.0,
+    "risk_factor": 1.0,
+    "client_type": 1.0,
+    "property": 0.5,
+}
+COMPANY_COUNTRY_FIELDS = ("country_headquarters", "country_of_production", "country_of_operation",
+                          "country_of_ressource", "client_country")
+LAW_FIELD_WEIGHTS = {
+    "sectors_of_activity": 3.0,
+    "regulation_types": 1.0,
+    "measures_imposed": 1.0,
+}
+COUNTRY_WEIGHT = 2.0
+SECTOR_FAMILY_WEIGHT = 3.0
+
+STOPWORDS = SECTOR_STOPWORDS | {
+    "with", "from", "that", "this", "which", "their", "these", "those", "such", "shall", "must", "have", "been",
+    "will", "into", "also", "other", "more", "than", "they", "them", "within", "under", "including", "where",
+}
+
+
+@lru_cache(maxsize=200_000)
+def _feature(token: str) -> tuple[int, float]:
+    """(colonne, signe) d'un token : hash stable entre processus, contrairement à hash()."""
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % N_FEATURES, 1.0 if (digest >> 63) else -1.0
+
+
+def _text_tokens(values) -> list[str]:
+    tokens = []
+    for value in _as_list(values):
+        words = [w for w in normalize_term(value).split() if len(w) >= 3 and w not in STOPWORDS]
+        tokens += words
+        tokens += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return tokens
+
+
+def _weighted_tokens(document: dict, field_weights: dict, country_fields, sector_fields) -> dict:
+    """{token: poids} : mots et bigrammes des champs texte, pays développés, familles de secteurs."""
+    counts = {}
+    for field, weight in field_weights.items():
+        for token in _text_tokens(document.get(field)):
+            counts[token] = counts.get(token, 0.0) + weight
+
+    countries = country_set(sum((_as_list(document.get(f)) for f in country_fields), []))
+    for country in countries:
+        counts[f"country:{country}"] = counts.get(f"country:{country}", 0.0) + COUNTRY_WEIGHT
+
+    families, _ = sector_profile(sum((_as_list(document.get(f)) for f in sector_fields), []))
+    for family in families:
+        counts[f"family:{family}"] = counts.get(f"family:{family}", 0.0) + SECTOR_FAMILY_WEIGHT
+    return counts
+
+
+def company_tokens(company: dict) -> dict:
+    return _weighted_tokens(company, COMPANY_FIELD_WEIGHTS, COMPANY_COUNTRY_FIELDS, ("sector", "sub_sector"))
+
+
+def law_tokens(law) -> dict:
+    document = law.model_dump() if hasattr(law, "model_dump") else dict(law)
+    return _weighted_tokens(document, LAW_FIELD_WEIGHTS, ("countrys",), ("sectors_of_activity",))
+
+
+def _hashed_vector(tokens: dict, idf_of_token=None) -> np.ndarray:
+    vector = np.zeros(N_FEATURES, dtype=np.float32)
+    for token, weight in tokens.items():
+        column, sign = _feature(token)
+        tf = 1.0 + math.log(weight) if weight > 1 else weight
+        vector[column] += sign * tf * (idf_of_token(column) if idf_of_token else 1.0)
+    return vector
+
+
+class CompanySimilarityIndex:
+    """
+    Index TF-IDF local des résumés 10-K : une ligne normalisée par entreprise dans une
+    matrice NumPy (hashing trick, pas de vocabulaire à stocker), ouverte en mémoire mappée.
+    La présélection d'une loi est un seul produit matrice-vecteur.
+    """
+
+    def __init__(self, directory: str, names: list[str], etags: dict, matrix: np.ndarray, idf: np.ndarray):
+        self.directory = directory
+        self.names = names
+        self.etags = etags
+        self.matrix = matrix
+        self.idf = idf
+
+    @staticmethod
+    def _paths(directory: str) -> tuple[str, str, str]:
+        return (os.path.join(directory, "matrix.npy"), os.path.join(directory, "idf.npy"),
+                os.path.join(directory, "manifest.json"))
+
+    @classmethod
+    def load(cls, directory: str = SIMILARITY_INDEX_DIR):
+        """Index déjà construit (matrice mappée depuis le disque), ou None."""
+        matrix_path, idf_path, manifest_path = cls._paths(directory)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != INDEX_VERSION or manifest.get("n_features") != N_FEATURES:
+                return None
+            matrix = np.load(matrix_path, mmap_mode="r")
+            idf = np.load(idf_path)
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            return None
+        return cls(directory, manifest["names"], manifest["etags"], matrix, idf)
+
+    @classmethod
+    def build(cls, companies: dict, etags: dict = None, directory: str = SIMILARITY_INDEX_DIR):
+        """
+        Construit et enregistre l'index.
+
+        Args:
+            companies: {nom de l'entreprise: résumé 10-K (dict Company10k)}.
+            etags: {nom: ETag S3 du résumé}, pour savoir plus tard si l'index est à jour.
+        """
+        names = sorted(companies)
+        tokens = [company_tokens(companies[name]) for name in names]
+
+        document_frequency = np.zeros(N_FEATURES, dtype=np.float32)
+        for company in tokens:
+            document_frequency[list({_feature(token)[0] for token in company})] += 1
+        idf = (np.log((1 + len(names)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        matrix = np.zeros((len(names), N_FEATURES), dtype=np.float32)
+        for row, company in enumerate(tokens):
+            matrix[row] = _hashed_vector(company, idf.__getitem__)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        os.makedirs(directory, exist_ok=True)
+        matrix_path, idf_path, manifest_path = cls._paths(directory)
+        for path, array in ((matrix_path, matrix), (idf_path, idf)):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "n_features": N_FEATURES, "names": names,
+                       "etags": etags or {}}, f)
+        os.replace(tmp_path, manifest_path)
+
+        print(f"🧭 Index de similarité construit : {len(names)} entreprises")
+        return cls.load(directory)
+
+    def is_current(self, etags: dict) -> bool:
+        """Vrai si l'index couvre exactement ces résumés (mêmes noms, mêmes ETags)."""
+        return self.etags == etags
+
+    def law_vector(self, law) -> np.ndarray:
+        vector = _hashed_vector(law_tokens(law), self.idf.__getitem__)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def similarities(self, law) -> np.ndarray:
+        return np.asarray(self.matrix @ self.law_vector(law))
+
+    def shortlist(self, law, top_k: int) -> list[tuple[str, float]]:
+        """Les `top_k` entreprises les plus proches de la loi : [(nom, similarité cosinus)]."""
+        start = time.perf_counter()
+        scores = self.similarities(law)
+        top_k = min(top_k, len(self.names))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        print(f"🧭 Présélection : {top_k}/{len(self.names)} entreprises en "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        return [(self.names[i], float(scores[i])) for i in best]
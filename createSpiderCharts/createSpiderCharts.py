@@ -12,10 +12,11 @@ from PIL import Image
 
 sys.path.insert(0, '/home/sagemaker-user/shared')
 
-from dataExtractionFrom10K.dataExtractionNumerical10K import getNumericalFrom10K
+from dataExtractionFrom10K.dataExtractionNumerical10K import getNumerical10K
 from dataExtractionFromYahoo.dataExtractionFromYahoo import get_financial_data
-from dataExtractionFrom10K.tableExtractionFrom10K import extract_only_tables
+from dataExtractionFrom10K.parsedFiling import ParsedFiling
 from dataExtractionFromLaw.dataExtractionFromLaw import getLawInformations
+from llmScheduler.llmScheduler import ScheduledClient
 
 class SpiderChartScore(BaseModel):
     PROFITABILITY_SCORE: int
@@ -47,10 +48,13 @@ class SpiderChart:
             raise FileNotFoundError(f"Aucun fichier HTML trouvé pour {ticker} dans {self.prefix}")
 
         html_key = html_files[0]
-        obj = s3.get_object(Bucket=self.BUCKET, Key=html_key)
-        html_content = obj["Body"].read().decode("utf-8")
+        # Parsé une seule fois puis relu depuis le cache disque pour les graphes suivants
+        self.filing = ParsedFiling.from_s3(self.BUCKET, html_key)
 
-        self.numerical_data = getNumericalFrom10K(extract_only_tables(html_content))
+        # Champs lus dans les états financiers, le modèle ne complète que les manquants
+        numerical = getNumerical10K(self.filing)
+        self.numerical_data = numerical.values
+        self.numerical_provenance = numerical.provenance
 
         # Data from 10K
         self.net_income = self.numerical_data.net_income
@@ -280,7 +284,7 @@ class SpiderChart:
 
     def getSpiderChartScores(self, prompt, law):
         bedrock_client = boto3.client('bedrock-runtime')
-        client = instructor.from_bedrock(bedrock_client)
+        client = ScheduledClient(instructor.from_bedrock(bedrock_client))
         response = client.chat.completions.create(
             modelId= "anthropic.claude-3-sonnet-20240229-v1:0",
             messages=[
@@ -0,0 +1,241 @@
+"""
+Benchmark de l'extraction des sections d'un 10-K : ancienne version BeautifulSoup,
+extracteur en streaming par marqueurs (ne garde que le texte des sections, défini ici
+car le pipeline ne l'utilise plus) et version actuelle (texte complet + index des Items).
+Chaque mesure tourne dans un processus neuf pour que le pic de RSS ne soit pas pollué
+par la mesure précédente.
+
+Usage :
+    python benchSectionExtraction.py chemin/vers/filing.html [--repeat 3]
+    python benchSectionExtraction.py AAPL/2024-11-01-10k-AAPL.html   (clé relative à BASE_PREFIX sur S3)
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sectionExtractionFrom10K import CHUNK_SIZE, stream_visible_text
+
+BUCKET = "csv-file-store-ec51f700"
+BASE_PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/fillings/"
+
+# Sections de l'extracteur par marqueurs : (marqueur de début, marqueur de fin)
+SECTIONS = [
+    ("ITEM 1.", "ITEM 1A."),   # Business
+    ("ITEM 1A.", "ITEM 2."),   # Risk Factors
+    ("ITEM 2.", "ITEM 3."),    # Properties
+    ("ITEM 7.", "ITEM 7A."),   # MD&A
+]
+
+
+def legacy_extract_relevant_sections(html_text):
+    # Copie de l'ancienne implémentation (DOM complet + regex sur tout le document)
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_text, "html.parser")
+
+    for tag in soup(["script", "style", "table"]):
+        tag.extract()
+
+    text = soup.get_text(separator="\n")
+
+    text = re.sub(r'\s+', ' ', text)
+    text = text.replace("\xa0", " ")
+    text_upper = text.upper()
+
+    def extract_section(start_marker, end_marker):
+        start = text_upper.find(start_marker)
+        if start == -1:
+            return ""
+        end = text_upper.find(end_marker, start)
+        if end == -1:
+            end = len(text_upper)
+        return text[start:end]
+
+    sections = [
+        extract_section("ITEM 1.", "ITEM 1A."),  # Business
+        extract_section("ITEM 1A.", "ITEM 2."),  # Risk Factors
+        extract_section("ITEM 2.", "ITEM 3."),   # Properties
+        extract_section("ITEM 7.", "ITEM 7A."),  # MD&A
+    ]
+
+    combined_text = "\n\n".join([s for s in sections if s.strip() != ""])
+    return combined_text.strip()
+
+
+class _SectionCollector:
+    """
+    Repère les marqueurs "ITEM x." dans le flux de texte normalisé et ne garde en mémoire
+    que le texte des sections demandées. Comme l'ancienne version, chaque section commence
+    à la première occurrence de son marqueur et s'arrête au marqueur de fin suivant.
+    """
+
+    def __init__(self, sections=SECTIONS):
+        self.sections = [
+            {"start_marker": start, "end_marker": end, "state": "waiting",
+             "start": 0, "end": None, "pieces": []}
+            for start, end in sections
+        ]
+        self.window_size = max(len(m) for pair in sections for m in pair) - 1
+        self.window = ""
+        self.position = 0
+
+    def write(self, text: str):
+        combined = self.window + text
+        base = self.position - len(self.window)
+        upper = combined.upper().replace("\n", " ")
+
+        for section in self.sections:
+            if section["state"] == "done":
+                continue
+
+            if section["state"] == "waiting":
+                lo = max(0, len(self.window) - len(section["start_marker"]) + 1)
+                i = upper.find(section["start_marker"], lo)
+                if i == -1:
+                    continue
+                section["state"] = "active"
+                section["start"] = base + i
+                section["pieces"].append(combined[i:])
+                end_lo = i
+            else:
+                section["pieces"].append(text)
+                end_lo = max(section["start"] - base, len(self.window) - len(section["end_marker"]) + 1)
+
+            j = upper.find(section["end_marker"], end_lo)
+            if j != -1:
+                section["state"] = "done"
+                section["end"] = base + j
+
+        self.position += len(text)
+        self.window = combined[-self.window_size:]
+
+    def results(self) -> list[str]:
+        texts = []
+        for section in self.sections:
+            if section["state"] == "waiting":
+                texts.append("")
+                continue
+            text = "".join(section["pieces"])
+            if section["end"] is not None:
+                text = text[:section["end"] - section["start"]]
+            texts.append(text)
+        return texts
+
+
+def extract_sections_streaming(source, sections=SECTIONS, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Extrait les sections Item 1 / 1A / 2 / 7 d'un 10-K en un seul passage sur le HTML,
+    sans DOM ni copie complète du texte : seul le texte des sections est conservé.
+
+    Args:
+        source: HTML du filing (str, bytes ou objet fichier, ex. obj["Body"] de S3).
+        sections: liste de couples (marqueur de début, marqueur de fin).
+
+    Returns:
+        str: les sections non vides, séparées par une ligne vide.
+    """
+    collector = stream_visible_text(source, _SectionCollector(sections), chunk_size)
+    return "\n\n".join([s.strip() for s in collector.results() if s.strip() != ""])
+
+
+def indexed_extract_relevant_sections(html_text):
+    # Version actuelle : texte visible en streaming + index des Items
+    from sectionIndexFrom10K import build_section_index, extract_visible_text, join_sections
+
+    text = extract_visible_text(html_text)
+    return join_sections(text, build_section_index(text))
+
+
+EXTRACTORS = {
+    "legacy (bs4)": legacy_extract_relevant_sections,
+    "streaming": extract_sections_streaming,
+    "indexed": indexed_extract_relevant_sections,
+}
+
+
+def _measure(name, path, queue):
+    with open(path, "rb") as f:
+        raw = f.read()
+    html_text = raw.decode("utf-8")
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    try:
+        result = EXTRACTORS[name](html_text)
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    elapsed = time.perf_counter() - start
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "seconds": elapsed,
+        "peak_rss_mb": rss_after / 1024,
+        "extra_rss_mb": (rss_after - rss_before) / 1024,
+        "output": result,
+    })
+
+
+def run_benchmark(path: str, repeat: int = 3) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+
+    for name in EXTRACTORS:
+        runs = []
+        for _ in range(repeat):
+            queue = ctx.Queue()
+            process = ctx.Process(target=_measure, args=(name, path, queue))
+            process.start()
+            runs.append(queue.get())
+            process.join()
+        if "error" in runs[0]:
+            print(f"⚠️ {name} : {runs[0]['error']}")
+            continue
+        results[name] = {
+            "seconds": min(r["seconds"] for r in runs),
+            "peak_rss_mb": min(r["peak_rss_mb"] for r in runs),
+            "extra_rss_mb": min(r["extra_rss_mb"] for r in runs),
+            "output": runs[0]["output"],
+        }
+    return results
+
+
+def _download(key: str) -> str:
+    import boto3
+    import tempfile
+
+    s3 = boto3.client("s3")
+    body = s3.get_object(Bucket=BUCKET, Key=BASE_PREFIX + key)["Body"].read()
+    fd, path = tempfile.mkstemp(suffix=".html")
+    with os.fdopen(fd, "wb") as f:
+        f.write(body)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filing", help="fichier HTML local ou clé S3 relative à BASE_PREFIX")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.filing if os.path.exists(args.filing) else _download(args.filing)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"📄 {path} ({size_mb:.1f} MB), best of {args.repeat}")
+
+    results = run_benchmark(path, args.repeat)
+    print(f"{'extracteur':<16}{'temps (s)':>12}{'pic RSS (MB)':>16}{'RSS extraction (MB)':>22}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['seconds']:>12.3f}{r['peak_rss_mb']:>16.1f}{r['extra_rss_mb']:>22.1f}")
+
+    # "indexed" ignore volontairement la table des matières : seul "streaming" doit coller à l'ancienne version
+    outputs = [" ".join(results[name]["output"].split()) for name in ("legacy (bs4)", "streaming") if name in results]
+    same = all(o == outputs[0] for o in outputs)
+    print("✅ Même texte extrait" if same else "⚠️ Les textes extraits diffèrent")
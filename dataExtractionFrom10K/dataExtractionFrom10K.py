@@ -1,12 +1,33 @@
 import boto3
 import instructor
-from pydantic import BaseModel
-from bs4 import BeautifulSoup
+import hashlib
+import json
+import multiprocessing
+import os
 import re
+import sys
+import threading
+from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+root_dir = os.path.dirname(current_dir)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from tokenBudget10K import (
+    CONTEXT_WINDOW_TOKENS, INPUT_TOKEN_BUDGET, PackingMetrics, chunk_text, estimate_tokens, pack_text,
+)
+from parsedFiling import ParsedFiling, parse_filing
+from llmScheduler.llmScheduler import ScheduledClient
+from concernedEntreprises.companyStore import CompanyProfileStore
 
 s3 = boto3.client("s3")
 bedrock_client = boto3.client('bedrock-runtime')
-client = instructor.from_bedrock(bedrock_client)
+# Tous les appels passent par l'ordonnanceur partagé (quotas, concurrence adaptative, relances)
+client = ScheduledClient(instructor.from_bedrock(bedrock_client))
 
 
 class Company10k(BaseModel):
@@ -27,46 +48,64 @@ class Company10k(BaseModel):
 BUCKET = "csv-file-store-ec51f700"
 BASE_PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/fillings/"
 OUTPUT_PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/fillingsResume"
+# Fichiers de suivi hors de OUTPUT_PREFIX : ce dossier ne doit contenir que des résumés d'entreprises
+STATE_PREFIX = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/extractionState/fillings"
+CHECKPOINT_KEY = f"{STATE_PREFIX}/_checkpoint.json"
+MANIFEST_KEY = f"{STATE_PREFIX}/_manifest.json"
+MAP_REDUCE_WORKERS = 8
+
+# Fichier compacté des résumés, lu par getConcernedEntreprises et réécrit uniquement par ce batch
+profile_store = CompanyProfileStore(s3, BUCKET, STATE_PREFIX)
 
 
 def extract_relevant_sections(html_text):
-    soup = BeautifulSoup(html_text, "html.parser")
+    """
+    Renvoie le texte des sections Business, Risk Factors, Properties et MD&A,
+    découpées d'après l'index des Items (et non la première occurrence de "ITEM x.").
+    """
+    return parse_filing(html_text).relevant_text()
+
 
-    for tag in soup(["script", "style", "table"]):
-        tag.extract()
+def get10kInformations(bucket: str, key: str, input_token_budget: int = INPUT_TOKEN_BUDGET) -> Company10k:
+    parsed = ParsedFiling.from_s3(bucket, key)
+    return get10kInformationsFromText(parsed.relevant_text(), input_token_budget)
 
-    text = soup.get_text(separator="\n")
 
-    text = re.sub(r'\s+', ' ', text)
-    text = text.replace("\xa0", " ")
-    text_upper = text.upper()
+def get10kInformationsFromText(text_to_analyze: str, input_token_budget: int = INPUT_TOKEN_BUDGET) -> Company10k:
+    response, _ = get10kInformationsWithMetrics(text_to_analyze, input_token_budget)
+    return response
+
 
-    def extract_section(start_marker, end_marker):
-        start = text_upper.find(start_marker)
-        if start == -1:
-            return ""
-        end = text_upper.find(end_marker, start)
-        if end == -1:
-            end = len(text_upper)
-        return text[start:end]
+def get10kInformationsWithMetrics(text_to_analyze: str, input_token_budget: int = INPUT_TOKEN_BUDGET,
+                                  map_reduce: bool = None) -> tuple[Company10k, PackingMetrics]:
+    """
+    Résume les sections d'un 10-K et renvoie aussi les métriques sur le texte envoyé.
 
-    sections = [
-        extract_section("ITEM 1.", "ITEM 1A."),  # Business
-        extract_section("ITEM 1A.", "ITEM 2."),  # Risk Factors
-        extract_section("ITEM 2.", "ITEM 3."),   # Properties
-        extract_section("ITEM 7.", "ITEM 7A."),  # MD&A
-    ]
+    Args:
+        input_token_budget (int): taille max (tokens estimés) d'un appel au modèle.
+        map_reduce (bool): True → le texte est découpé en chunks résumés en parallèle puis fusionnés,
+            False → seuls les paragraphes les plus pertinents sont gardés sous le budget,
+            None → map-reduce seulement si le texte dépasse une fenêtre de contexte.
+    """
+    if map_reduce is None:
+        map_reduce = estimate_tokens(text_to_analyze) > CONTEXT_WINDOW_TOKENS
 
-    combined_text = "\n\n".join([s for s in sections if s.strip() != ""])
-    return combined_text.strip()
+    if map_reduce:
+        chunks, metrics = chunk_text(text_to_analyze, input_token_budget)
+        if len(chunks) > 1:
+            print(f"🧩 Map-reduce: {metrics.summary()}")
+            with ThreadPoolExecutor(max_workers=MAP_REDUCE_WORKERS) as executor:
+                partials = list(executor.map(summarize10kChunk, chunks))
+            return merge_company10k(partials), metrics
 
+    text_to_analyze, metrics = pack_text(text_to_analyze, input_token_budget)
+    if metrics.kept_tokens < metrics.input_tokens:
+        print(f"📦 Packed: {metrics.summary()}")
 
-def get10kInformations(bucket: str, key: str) -> Company10k:
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    text_10K = obj["Body"].read().decode("utf-8")
+    return summarize10kChunk(text_to_analyze), metrics
 
-    text_to_analyze = extract_relevant_sections(text_10K)
 
+def summarize10kChunk(text_to_analyze: str) -> Company10k:
     response = client.chat.completions.create(
         modelId="global.anthropic.claude-haiku-4-5-20251001-v1:0",
         messages=[
@@ -99,35 +138,291 @@ def get10kInformations(bucket: str, key: str) -> Company10k:
     return response
 
 
-def process_all_fillings():
+def _dedup_key(value: str) -> str:
+    return re.sub(r"[\W_]+", " ", value).strip().casefold()
+
+
+def merge_company10k(partials: list[Company10k]) -> Company10k:
+    """
+    Réduction locale des résumés partiels : les listes sont concaténées sans doublons
+    (comparaison insensible à la casse et à la ponctuation), les textes libres viennent
+    du premier chunk qui en fournit un (Item 1 est toujours en tête).
+    """
+    merged = {}
+    for field, info in Company10k.model_fields.items():
+        values = [getattr(p, field) for p in partials]
+        if info.annotation is str:
+            merged[field] = next((v for v in values if v and v.strip()), "")
+            continue
+
+        seen = set()
+        merged[field] = []
+        for items in values:
+            for item in items:
+                key = _dedup_key(item)
+                if key and key not in seen:
+                    seen.add(key)
+                    merged[field].append(item)
+    return Company10k(**merged)
+
+
+class _S3JsonState:
+    """
+    Petit état JSON partagé entre threads et persisté sur S3 (écriture tous les `flush_every` changements).
+    """
+
+    def __init__(self, bucket: str, key: str, flush_every: int = 10):
+        self.bucket = bucket
+        self.key = key
+        self.flush_every = flush_every
+        self.entries = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            obj = s3.get_object(Bucket=self.bucket, Key=self.key)
+            self.entries = json.loads(obj["Body"].read().decode("utf-8")).get("entries", {})
+        except s3.exceptions.NoSuchKey:
+            self.entries = {}
+        return self
+
+    def get(self, key: str):
+        with self._lock:
+            return self.entries.get(key)
+
+    def set(self, key: str, value):
+        with self._lock:
+            self.entries[key] = value
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._save()
+
+    def flush(self):
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+            self._pending = 0
+            s3.delete_object(Bucket=self.bucket, Key=self.key)
+
+    def _save(self):
+        s3.put_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=json.dumps({"entries": self.entries}).encode("utf-8"),
+            ContentType="application/json",
+        )
+        self._pending = 0
+
+
+class BatchCheckpoint(_S3JsonState):
+    """
+    Manifest des fillings déjà traités pendant un batch, stocké sur S3 sous STATE_PREFIX.
+    Si un run plante, le run suivant relit ce fichier et reprend là où il s'était arrêté.
+    Le fichier est supprimé quand un batch se termine sans erreur.
+    """
+
+    def __init__(self, bucket: str = BUCKET, key: str = CHECKPOINT_KEY, flush_every: int = 10):
+        super().__init__(bucket, key, flush_every)
+
+    def is_done(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def mark_done(self, key: str, output_key: str):
+        self.set(key, output_key)
+
+
+class FillingsManifest(_S3JsonState):
+    """
+    ETag et SHA-256 de chaque filing au moment où il a été résumé.
+    En mode incrémental, un filing dont l'ETag (ou à défaut le contenu) n'a pas changé
+    et dont le résumé existe déjà n'est pas renvoyé au modèle.
+    """
+
+    def __init__(self, bucket: str = BUCKET, key: str = MANIFEST_KEY, flush_every: int = 10):
+        super().__init__(bucket, key, flush_every)
+
+    def etag_unchanged(self, key: str, etag: str) -> bool:
+        entry = self.get(key)
+        return entry is not None and entry.get("etag") == etag
+
+    def hash_unchanged(self, key: str, sha256: str) -> bool:
+        entry = self.get(key)
+        return entry is not None and entry.get("sha256") == sha256
+
+    def record(self, key: str, etag: str, sha256: str, output_key: str, packing: PackingMetrics = None):
+        entry = dict(self.get(key) or {})
+        entry.update({"etag": etag, "sha256": sha256, "output_key": output_key})
+        if packing is not None:
+            entry["packing"] = packing.model_dump()
+        self.set(key, entry)
+
+
+def output_key_for(key: str) -> str:
+    return key.replace("/fillings/", "/fillingsResume/").replace(".html", ".json")
+
+
+def list_existing_outputs() -> set:
     paginator = s3.get_paginator("list_objects_v2")
-    pages = paginator.paginate(Bucket=BUCKET, Prefix=BASE_PREFIX)
+    existing = set()
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=OUTPUT_PREFIX):
+        for obj in page.get("Contents", []):
+            existing.add(obj["Key"])
+    return existing
+
 
-    for page in pages:
+def list_company_summaries() -> dict:
+    """{nom de l'entreprise: (clé S3 du résumé, ETag)} pour tous les résumés sous OUTPUT_PREFIX."""
+    paginator = s3.get_paginator("list_objects_v2")
+    summaries = {}
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=OUTPUT_PREFIX + "/"):
         for obj in page.get("Contents", []):
-            key = obj["Key"]
-            if not key.endswith(".html"):
-                continue
+            if obj["Key"].endswith(".json") and not os.path.basename(obj["Key"]).startswith("_"):
+                summaries[os.path.dirname(obj["Key"]).split("/")[-1]] = (obj["Key"], obj["ETag"])
+    return summaries
+
+
+def load_summary(key: str) -> dict:
+    return json.loads(s3.get_object(Bucket=BUCKET, Key=key)["Body"].read().decode("utf-8"))
+
+
+def compact_company_profiles():
+    """Réécrit le fichier compacté des profils si des résumés ont été ajoutés, modifiés ou supprimés."""
+    if not profile_store.update(list_company_summaries(), load_summary):
+        print("📦 Profils des entreprises déjà à jour")
+
+
+def process_single_filling(key: str, parse_pool=None, manifest: FillingsManifest = None,
+                           etag: str = None, output_exists: bool = False) -> tuple[str, bool]:
+    """
+    Traite un filing de bout en bout : téléchargement S3, extraction des sections,
+    appel Bedrock et upload du résumé. Le parsing HTML (CPU) part dans `parse_pool`
+    s'il est fourni, le reste (I/O) reste dans le thread appelant.
+
+    Returns:
+        (output_key, summarized) : `summarized` vaut False si le contenu était inchangé
+        d'après le manifest et que l'appel au modèle a été évité.
+    """
+    obj = s3.get_object(Bucket=BUCKET, Key=key)
+    raw = obj["Body"].read()
+    etag = obj.get("ETag", etag)
+    sha256 = hashlib.sha256(raw).hexdigest()
+    output_key = output_key_for(key)
+
+    if manifest is not None and output_exists and manifest.hash_unchanged(key, sha256):
+        manifest.record(key, etag, sha256, output_key)
+        return output_key, False
+
+    text_10K = raw.decode("utf-8")
+
+    if parse_pool is not None:
+        parsed = parse_pool.submit(parse_filing, text_10K).result()
+    else:
+        parsed = parse_filing(text_10K)
+
+    parsed.save(ParsedFiling.cache_path(BUCKET, key, etag))
+    text_to_analyze = parsed.relevant_text()
+
+    company_data, packing = get10kInformationsWithMetrics(text_to_analyze)
+    json_data = company_data.model_dump_json(indent=2)
+
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=output_key,
+        Body=json_data.encode("utf-8"),
+        ContentType="application/json",
+    )
+
+    if manifest is not None:
+        manifest.record(key, etag, sha256, output_key, packing)
+    return output_key, True
+
+
+def process_all_fillings(max_workers: int = 8, parse_workers: int = 2, resume: bool = True,
+                         incremental: bool = True):
+    """
+    Résume tous les fillings `.html` sous BASE_PREFIX.
+
+    Args:
+        max_workers (int): nombre max de fillings traités en parallèle (threads : S3 + Bedrock).
+        parse_workers (int): nombre de processus pour le parsing HTML (0 = parsing dans les threads).
+        resume (bool): reprend depuis le checkpoint S3 laissé par un run interrompu.
+        incremental (bool): ne re-résume que les fillings nouveaux ou modifiés (ETag / SHA-256 du manifest).
+    """
+    checkpoint = BatchCheckpoint()
+    if resume:
+        checkpoint.load()
+        if checkpoint.entries:
+            print(f"⏩ Resuming: {len(checkpoint.entries)} fillings already processed")
+
+    manifest = FillingsManifest().load() if incremental else FillingsManifest()
+    existing_outputs = list_existing_outputs() if incremental else set()
+
+    paginator = s3.get_paginator("list_objects_v2")
+    pages = paginator.paginate(Bucket=BUCKET, Prefix=BASE_PREFIX)
+
+    # forkserver : les processus de parsing ne sont pas forkés depuis les threads de
+    # téléchargement (verrous boto3 / urllib3 / logging éventuellement tenus → interblocage)
+    parse_pool = ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("forkserver"),
+    ) if parse_workers > 0 else None
+    errors = 0
+    skipped = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for page in pages:
+                for obj in page.get("Contents", []):
+                    key = obj["Key"]
+                    if not key.endswith(".html") or checkpoint.is_done(key):
+                        continue
+
+                    output_exists = output_key_for(key) in existing_outputs
+                    if incremental and output_exists and manifest.etag_unchanged(key, obj["ETag"]):
+                        skipped += 1
+                        continue
 
-            print(f"🔍 Processing: {key}")
+                    print(f"🔍 Processing: {key}")
+                    future = executor.submit(
+                        process_single_filling, key, parse_pool,
+                        manifest if incremental else None, obj["ETag"], output_exists,
+                    )
+                    futures[future] = key
 
-            try:
-                company_data = get10kInformations(BUCKET, key)
-                json_data = company_data.model_dump_json(indent=2)
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    output_key, summarized = future.result()
+                    checkpoint.mark_done(key, output_key)
+                    if summarized:
+                        print(f"✅ Saved: {output_key}")
+                    else:
+                        skipped += 1
+                        print(f"⏭️ Unchanged: {key}")
+                except Exception as e:
+                    errors += 1
+                    print(f"❌ Error processing {key}: {e}")
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        checkpoint.flush()
+        if incremental:
+            manifest.flush()
 
-                output_key = key.replace("/fillings/", "/fillingsResume/").replace(".html", ".json")
+    if skipped:
+        print(f"⏭️ {skipped} unchanged fillings skipped")
 
-                s3.put_object(
-                    Bucket=BUCKET,
-                    Key=output_key,
-                    Body=json_data.encode("utf-8"),
-                    ContentType="application/json",
-                )
-                print(f"✅ Saved: {output_key}")
+    compact_company_profiles()
 
-            except Exception as e:
-                print(f"❌ Error processing {key}: {e}")
+    if errors == 0:
+        checkpoint.clear()
+    else:
+        print(f"⚠️ {errors} fillings failed, checkpoint kept at s3://{BUCKET}/{CHECKPOINT_KEY}")
 
 
 if __name__ == "__main__":
-    process_all_fillings()
\ No newline at end of file
+    process_all_fillings()
@@ -1,18 +1,26 @@
 import boto3
 import instructor
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
 import os
 import sys
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
+root_dir = os.path.dirname(current_dir)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
 
-from tableExtractionFrom10K import extract_only_tables
+from numericalRulesFrom10K import extract_numerical_with_rules
+from parsedFiling import parse_filing
+from tableExtractionFrom10K import extract_only_tables, extract_structured_tables, format_tables_for_prompt
+from xbrlFactsFrom10K import extract_numerical_from_xbrl
+from llmScheduler.llmScheduler import ScheduledClient
 
 s3 = boto3.client("s3")
 bedrock_client = boto3.client('bedrock-runtime')
-client = instructor.from_bedrock(bedrock_client)
+# Tous les appels passent par l'ordonnanceur partagé (quotas, concurrence adaptative, relances)
+client = ScheduledClient(instructor.from_bedrock(bedrock_client))
 
 BUCKET = "csv-file-store-ec51f700"
 KEY = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/fillings/AAPL/2024-11-01-10k-AAPL.html"
@@ -34,12 +42,63 @@ class Numerical_10K(BaseModel):
     operating_income: int
     cost_of_good_sold: int
     inventory_avg: int
-    cost_of_debt: int
+    cost_of_debt: float
     corporate_tax_rate: float
 
 
 
-def getNumericalFrom10K(text_of_tables: str) -> Numerical_10K:
+# Description de chaque champ, reprise dans le prompt
+FIELD_DESCRIPTIONS = {
+    "net_income": "Net income (net earnings attributable to shareholders).",
+    "revenue": "Total revenue (also called net sales or total operating revenues).",
+    "preferred_dividend": "Preferred dividends paid during the year (if applicable, else 0). return a float for this value",
+    "average_of_CS": "Average number of common shares outstanding.",
+    "she": "Shareholders' equity (total equity or total stockholders’ equity).",
+    "total_asset": "Total assets at the end of the period.",
+    "eps_current": "Earnings per share (basic or diluted) for the current year. return a float for this value",
+    "eps_previous": "Earnings per share (previous year, if available) return a float for this value",
+    "revenue_current": "Total revenue for the current year.",
+    "revenue_previous": "Total revenue for the previous year.",
+    "asset_current": "Current assets (total current assets section).",
+    "liabilities_current": "Current liabilities (total current liabilities section).",
+    "total_debt": "Total debt (sum of long-term and short-term borrowings).",
+    "operating_income": "Operating income (operating profit or EBIT).",
+    "cost_of_good_sold": "Cost of goods sold (COGS or cost of revenue).",
+    "inventory_avg": "Average inventory (use average between current and previous year if available, else 0).",
+    "cost_of_debt": "Cost of debt for the last year: interest expense divided by total debt. return a float for this value",
+    "corporate_tax_rate": "from the last year",
+}
+
+
+class Numerical10KResult(BaseModel):
+    values: Numerical_10K
+    # Origine de chaque champ : "xbrl" (faits iXBRL), "rule" (lu dans les états financiers) ou "llm"
+    provenance: dict[str, str]
+
+
+def _partial_model(fields: list[str]):
+    """Sous-modèle de Numerical_10K limité aux champs demandés au modèle."""
+    return create_model(
+        "Numerical_10K_partial",
+        **{f: (Numerical_10K.model_fields[f].annotation, ...) for f in fields},
+    )
+
+
+def getNumericalFrom10K(text_of_tables: str, fields: list[str] = None):
+    """
+    Extraction par le modèle. Si `fields` est donné, seuls ces champs sont demandés
+    et la réponse est un sous-modèle de Numerical_10K.
+    """
+    if fields is None:
+        response_model = Numerical_10K
+        fields = list(Numerical_10K.model_fields)
+    else:
+        response_model = _partial_model(fields)
+
+    fields_prompt = "".join(
+        f"{i}. **{f}** – {FIELD_DESCRIPTIONS[f]}\n" for i, f in enumerate(fields, start=1)
+    )
+
     response = client.chat.completions.create(
         modelId="global.anthropic.claude-haiku-4-5-20251001-v1:0",
         messages=[
@@ -59,45 +118,69 @@ def getNumericalFrom10K(text_of_tables: str) -> Numerical_10K:
                     "Do not make up any data.\n\n"
 
                     "Extract the following fields:\n\n"
-                    "1. **net_income** – Net income (net earnings attributable to shareholders).\n"
-                    "2. **revenue** – Total revenue (also called net sales or total operating revenues).\n"
-                    "3. **preferred_dividend** – Preferred dividends paid during the year (if applicable, else 0). return a float for this value\n"
-                    "4. **average_of_CS** – Average number of common shares outstanding.\n"
-                    "5. **she** – Shareholders' equity (total equity or total stockholders’ equity).\n"
-                    "6. **total_asset** – Total assets at the end of the period.\n"
-                    "7. **eps_current** – Earnings per share (basic or diluted) for the current year. return a float for this value\n"
-                    "8. **eps_previous** – Earnings per share (previous year, if available) return a float for this value\n"
-                    "9. **revenue_current** – Total revenue for the current year.\n"
-                    "10. **revenue_previous** – Total revenue for the previous year.\n"
-                    "11. **asset_current** – Current assets (total current assets section).\n"
-                    "12. **liabilities_current** – Current liabilities (total current liabilities section).\n"
-                    "13. **total_debt** – Total debt (sum of long-term and short-term borrowings).\n"
-                    "14. **operating_income** – Operating income (operating profit or EBIT).\n"
-                    "15. **cost_of_good_sold** – Cost of goods sold (COGS or cost of revenue).\n"
-                    "16. **inventory_avg** – Average inventory (use average between current and previous year if available, else 0).\n\n"
-                    "17. **cost_of_debt** - cost of the debt from the last year"
-                    "18. **corporate_tax_rate** - from the last year"
+                    f"{fields_prompt}\n"
 
                     "Rules:\n"
                     "- If the value is shown in millions or thousands, convert it to full integer form (e.g., '1,234 million' → 1234000000).\n"
                     "- If both consolidated and parent-only data are shown, choose the **consolidated** figures.\n"
-                    "- Prefer USD values if multiple currencies are listed.\n\n"
+                    "- Prefer USD values if multiple currencies are listed.\n"
+                    "- Statements given as `label | year | year` rows are already converted to full units.\n\n"
 
                     "Here are the financial tables extracted from the company's 10-K:\n\n"
                     f"{text_of_tables}"
                 ),
             },
         ],
-        response_model=Numerical_10K,
+        response_model=response_model,
         inferenceConfig={
             "maxTokens": 64000,
         }
     )
     return response
 
+
+def _coerce(field: str, value):
+    return int(round(value)) if Numerical_10K.model_fields[field].annotation is int else float(value)
+
+
+def getNumerical10K(filing) -> Numerical10KResult:
+    """
+    Numerical_10K d'un filing (ParsedFiling ou HTML brut). Par ordre de priorité : faits
+    iXBRL (valeurs exactes), libellés standards des états financiers, puis le modèle
+    uniquement pour les champs restants.
+    """
+    if isinstance(filing, (str, bytes)) or hasattr(filing, "read"):
+        filing = parse_filing(filing)
+
+    values = {f: _coerce(f, v) for f, v in extract_numerical_from_xbrl(filing.facts).items()}
+    provenance = {f: "xbrl" for f in values}
+
+    tables = []
+    if len(values) < len(Numerical_10K.model_fields):
+        tables = extract_structured_tables(filing)
+        for f, v in extract_numerical_with_rules(tables).items():
+            if f not in values:
+                values[f] = _coerce(f, v)
+                provenance[f] = "rule"
+
+    missing = [f for f in Numerical_10K.model_fields if f not in values]
+    print(
+        f"⚡ {len(values)}/{len(Numerical_10K.model_fields)} champs lus localement "
+        f"({sum(1 for p in provenance.values() if p == 'xbrl')} iXBRL)"
+    )
+    if missing:
+        print(f"🤖 Appel au modèle pour : {', '.join(missing)}")
+        text_of_tables = format_tables_for_prompt(tables) if tables else extract_only_tables(filing)
+        partial = getNumericalFrom10K(text_of_tables, fields=missing)
+        values.update(partial.model_dump())
+        provenance.update({f: "llm" for f in missing})
+
+    return Numerical10KResult(values=Numerical_10K(**values), provenance=provenance)
+
 if __name__ == "__main__":
     obj = s3.get_object(Bucket=BUCKET, Key=KEY)
     text_of_10K = obj["Body"].read().decode("utf-8")
-    data = extract_only_tables(text_of_10K)
+    result = getNumerical10K(text_of_10K)
     print("============================================================================================")
-    print(getNumericalFrom10K(data))
\ No newline at end of file
+    print(result.values)
+    print(result.provenance)
\ No newline at end of file
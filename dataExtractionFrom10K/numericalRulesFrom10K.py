@@ -0,0 +1,166 @@
+import os
+import re
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from tableExtractionFrom10K import FinancialTable
+
+# Synonymes des libellés de lignes, par champ de Numerical_10K : (état financier, motifs).
+# Les motifs sont essayés dans l'ordre ; le premier qui trouve une ligne l'emporte.
+FIELD_SYNONYMS = {
+    "revenue": ("income_statement", [
+        r"^total (net )?(sales|revenues?|operating revenues?)$",
+        r"^(net sales|revenues?|net revenues?): total$",
+        r"^(net )?(sales|revenues?)$",
+        r"^total (net )?sales and (operating )?revenues?$",
+    ]),
+    "net_income": ("income_statement", [
+        r"^net (income|earnings)( attributable to [\w .,']+)?$",
+        r"^net (income|earnings) \(loss\)$",
+        r"^net (loss|income) \(income\)$",
+    ]),
+    "operating_income": ("income_statement", [
+        r"^(total )?operating (income|profit)$",
+        r"^income from operations$",
+        r"^operating income \(loss\)$",
+    ]),
+    "cost_of_good_sold": ("income_statement", [
+        r"^total cost of (sales|revenues?|goods sold)$",
+        r"^cost of (sales|revenues?|goods sold): total$",
+        r"^cost of (sales|revenues?|goods sold)$",
+    ]),
+    "eps_current": ("income_statement", [
+        r"(earnings|net income|income) per (common )?share\b.*: diluted$",
+        r"^diluted (earnings|net income|income) per (common )?share",
+        r"(earnings|net income|income) per (common )?share\b.*: basic$",
+        r"^basic (earnings|net income|income) per (common )?share",
+    ]),
+    "average_of_CS": ("income_statement", [
+        r"shares.*: diluted$",
+        r"weighted[- ]average.*shares.*diluted|diluted.*weighted[- ]average",
+        r"shares.*: basic$",
+        r"weighted[- ]average.*shares",
+    ]),
+    "total_asset": ("balance_sheet", [r"^total assets$"]),
+    "asset_current": ("balance_sheet", [r"^total current assets$"]),
+    "liabilities_current": ("balance_sheet", [r"^total current liabilities$"]),
+    "she": ("balance_sheet", [
+        r"^total (shareholders|stockholders)' equity$",
+        r"^total equity$",
+        r"^total (shareholders|stockholders)' equity \(deficit\)$",
+    ]),
+    "inventory_avg": ("balance_sheet", [r"^(total )?inventor(y|ies)(, net)?$"]),
+}
+
+# Lignes de dette du bilan, additionnées pour total_debt
+DEBT_PATTERNS = [
+    r"^commercial paper$",
+    r"^short-term (debt|borrowings)$",
+    r"^current portion of long-term debt",
+    r"^long-term debt(, (net|non-current|current portion))*$",
+    r"^term debt$",
+    r"^notes payable$",
+]
+
+_INCOME_TAX_RE = r"^(provision for|benefit from|\(?provision\)? for) income taxes$|^income tax(es| expense)( \(benefit\))?$"
+_INTEREST_EXPENSE_RE = r"^(total )?interest expense(, net)?$"
+_PRETAX_RE = r"^income before (provision for |\(?provision\)? for )?income taxes$|^(earnings|income) before income taxes$"
+
+
+def _normalize(label: str) -> str:
+    return label.lower().replace("’", "'").replace("  ", " ").strip()
+
+
+def _ordered_columns(table: FinancialTable) -> list:
+    """Colonnes de la plus récente à la plus ancienne quand les en-têtes sont des années."""
+    columns = list(table.frame.columns)
+    if columns and all(str(c).isdigit() for c in columns):
+        return sorted(columns, key=int, reverse=True)
+    return columns
+
+
+def _find_row(tables: list[FinancialTable], kind: str, patterns: list[str]):
+    """Valeurs (récentes → anciennes) de la première ligne qui correspond à un motif."""
+    candidates = [t for t in tables if t.kind == kind]
+    for pattern in patterns:
+        for table in candidates:
+            for label, row in table.frame.iterrows():
+                if re.search(pattern, _normalize(label)):
+                    return [row[c] for c in _ordered_columns(table)]
+    return None
+
+
+def _matching_rows(tables: list[FinancialTable], kind: str, patterns: list[str]) -> list:
+    """Toutes les lignes qui correspondent, dans le premier tableau qui en contient."""
+    for table in tables:
+        if table.kind != kind:
+            continue
+        rows = [
+            [row[c] for c in _ordered_columns(table)]
+            for label, row in table.frame.iterrows()
+            if any(re.search(pattern, _normalize(label)) for pattern in patterns)
+        ]
+        if rows:
+            return rows
+    return []
+
+
+def _value(values, column: int = 0):
+    if values is None or len(values) <= column or values[column] != values[column]:
+        return None
+    return float(values[column])
+
+
+def extract_numerical_with_rules(tables: list[FinancialTable]) -> dict:
+    """
+    Remplit les champs de Numerical_10K lisibles directement dans les états financiers
+    structurés (voir extract_structured_tables). Les champs introuvables sont absents
+    du résultat et restent à la charge du modèle.
+    """
+    values = {}
+
+    for field, (kind, patterns) in FIELD_SYNONYMS.items():
+        row = _find_row(tables, kind, patterns)
+        if field == "inventory_avg":
+            current, previous = _value(row, 0), _value(row, 1)
+            if current is not None:
+                values[field] = (current + previous) / 2 if previous is not None else current
+        elif field == "eps_current":
+            if _value(row, 0) is not None:
+                values["eps_current"] = _value(row, 0)
+            if _value(row, 1) is not None:
+                values["eps_previous"] = _value(row, 1)
+        elif field == "revenue":
+            if _value(row, 0) is not None:
+                values["revenue"] = values["revenue_current"] = _value(row, 0)
+            if _value(row, 1) is not None:
+                values["revenue_previous"] = _value(row, 1)
+        elif _value(row, 0) is not None:
+            values[field] = _value(row, 0)
+
+    # Dette courante et non courante (ex. "Term debt" apparaît dans les deux blocs)
+    debt = [_value(row, 0) for row in _matching_rows(tables, "balance_sheet", DEBT_PATTERNS)]
+    debt = [d for d in debt if d is not None]
+    if debt:
+        values["total_debt"] = sum(debt)
+
+    # Coût de la dette : charge d'intérêts / dette totale, comme dataExtractionFromYahoo
+    interest = _value(_find_row(tables, "income_statement", [_INTEREST_EXPENSE_RE]), 0)
+    if interest is not None and values.get("total_debt"):
+        values["cost_of_debt"] = abs(interest) / values["total_debt"]
+
+    # Taux effectif : charge d'impôt / résultat avant impôt
+    tax = _value(_find_row(tables, "income_statement", [_INCOME_TAX_RE]), 0)
+    pretax = _value(_find_row(tables, "income_statement", [_PRETAX_RE]), 0)
+    if tax is not None and pretax:
+        values["corporate_tax_rate"] = tax / pretax
+
+    # Pas d'actions préférentielles au bilan : aucun dividende préférentiel
+    labels = [_normalize(label) for t in tables if t.kind == "balance_sheet" for label in t.frame.index]
+    if labels and not any("preferred" in label for label in labels):
+        values["preferred_dividend"] = 0.0
+
+    return values
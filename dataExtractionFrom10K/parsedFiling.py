@@ -0,0 +1,159 @@
+import boto3
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sectionExtractionFrom10K import _TextNormalizer, _VisibleTextHandler, feed_html
+from sectionIndexFrom10K import RELEVANT_ITEMS, _TextBuffer, build_section_index, join_sections, slice_section
+from xbrlFactsFrom10K import _XbrlCollector
+
+s3 = boto3.client("s3")
+
+CACHE_VERSION = 2
+PARSED_CACHE_DIR = os.environ.get(
+    "PARSED_FILINGS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "parsedFilings")
+)
+
+
+class _FilingHandler(_VisibleTextHandler):
+    """
+    Un seul passage sur le HTML : texte visible normalisé (hors tableaux), tableaux
+    ligne par ligne et faits iXBRL. Chaque tableau garde l'offset du texte où il apparaît,
+    ce qui permet de le rattacher à un Item et de lire son contexte ("in millions", titre, ...).
+    """
+
+    def __init__(self):
+        self.buffer = _TextBuffer()
+        super().__init__(_TextNormalizer(self.buffer))
+        self.tables = []
+        self._open_tables = []
+        self.xbrl = _XbrlCollector()
+
+    def on_start(self, tag, attrib):
+        super().on_start(tag, attrib)
+        self.xbrl.on_start(tag, attrib)
+        if tag == "table":
+            self._open_tables.append({"rows": [], "offset": self.normalizer.length, "row": None, "cell": None})
+        elif not self._open_tables:
+            return
+        elif tag == "tr":
+            self._open_tables[-1]["row"] = []
+        elif tag in ("td", "th") and self._open_tables[-1]["row"] is not None:
+            self._open_tables[-1]["cell"] = []
+
+    def on_end(self, tag):
+        super().on_end(tag)
+        self.xbrl.on_end(tag)
+        if not self._open_tables:
+            return
+        table = self._open_tables[-1]
+        if tag in ("td", "th") and table["cell"] is not None:
+            table["row"].append(" ".join(table["cell"]))
+            table["cell"] = None
+        elif tag == "tr" and table["row"] is not None:
+            if table["row"]:
+                table["rows"].append(table["row"])
+            table["row"] = None
+        elif tag == "table":
+            self._open_tables.pop()
+            if table["rows"]:
+                self.tables.append({"rows": table["rows"], "offset": table["offset"]})
+
+    def on_text(self, text):
+        super().on_text(text)
+        self.xbrl.on_text(text)
+        if self._open_tables and self._open_tables[-1]["cell"] is not None and text.strip():
+            self._open_tables[-1]["cell"].append(text.strip())
+
+
+class ParsedFiling:
+    """
+    Filing 10-K parsé une seule fois (lxml si disponible) : texte nettoyé, index des Items,
+    tableaux et faits iXBRL. Mis en cache sur disque (JSON gzip) pour que les étapes suivantes
+    (résumé, extraction des tableaux, spider charts) ne re-parsent jamais le HTML.
+
+    Compromis mémoire : tout le texte visible du filing est gardé (quelques Mo, contre
+    plusieurs centaines de Mo pour un DOM BeautifulSoup), là où l'extracteur par marqueurs
+    de benchSectionExtraction.py ne gardait que les Items résumés. C'est ce texte complet
+    qui permet l'index des Items et le rattachement des tableaux à leur section.
+    """
+
+    def __init__(self, text: str, sections: list[dict], tables: list[dict], facts: list[dict] = None):
+        self.text = text
+        self.sections = sections
+        self.tables = tables
+        self.facts = facts or []
+
+    @classmethod
+    def from_html(cls, source):
+        """`source` : str, bytes ou objet fichier (ex. obj["Body"] de S3)."""
+        handler = _FilingHandler()
+        feed_html(source, handler)
+        text = handler.buffer.getvalue()
+        return cls(text, build_section_index(text), handler.tables, handler.xbrl.facts())
+
+    @classmethod
+    def from_s3(cls, bucket: str, key: str, cache_dir: str = PARSED_CACHE_DIR):
+        etag = s3.head_object(Bucket=bucket, Key=key)["ETag"]
+        path = cls.cache_path(bucket, key, etag, cache_dir)
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except ValueError:
+                pass
+
+        obj = s3.get_object(Bucket=bucket, Key=key)
+        parsed = cls.from_html(obj["Body"])
+        parsed.save(path)
+        return parsed
+
+    @staticmethod
+    def cache_path(bucket: str, key: str, etag: str, cache_dir: str = PARSED_CACHE_DIR) -> str:
+        digest = hashlib.sha256(f"{bucket}/{key}@{etag}".encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, f"{digest}.json.gz")
+
+    def section(self, item: str) -> str:
+        return slice_section(self.text, self.sections, item)
+
+    def relevant_text(self, items=RELEVANT_ITEMS) -> str:
+        return join_sections(self.text, self.sections, items)
+
+    def tables_in(self, item: str) -> list[dict]:
+        for entry in self.sections:
+            if entry["item"] == item:
+                # Le dernier Item va jusqu'à la fin du texte, tableaux finaux compris
+                end = entry["end"] + 1 if entry["end"] >= len(self.text) else entry["end"]
+                return [t for t in self.tables if entry["start"] <= t["offset"] < end]
+        return []
+
+    def to_dict(self) -> dict:
+        return {
+            "version": CACHE_VERSION, "text": self.text, "sections": self.sections,
+            "tables": self.tables, "facts": self.facts,
+        }
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with gzip.open(os.fdopen(fd, "wb"), "wt", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != CACHE_VERSION:
+            raise ValueError(f"Parsed filing cache {path} has version {payload.get('version')}")
+        return cls(payload["text"], payload["sections"], payload["tables"], payload["facts"])
+
+
+def parse_filing(html_text) -> ParsedFiling:
+    return ParsedFiling.from_html(html_text)
@@ -0,0 +1,212 @@
+import codecs
+import io
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+SKIPPED_TAGS = {"script", "style", "table"}
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "div", "dl", "dt",
+    "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "html", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "title", "tr", "ul",
+}
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class _TextNormalizer:
+    """
+    Normalise le texte visible au fil de l'eau : chaque suite d'espaces devient
+    un seul caractère, "\\n" si elle traverse une frontière de bloc HTML, " " sinon.
+    Les morceaux normalisés sont transmis à `sink.write`.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = ""
+        self.started = False
+        self.length = 0
+
+    def separator(self, block: bool = False):
+        if block or self.pending == "\n":
+            self.pending = "\n"
+        else:
+            self.pending = " "
+
+    def write(self, data: str):
+        parts = _WHITESPACE_RE.split(data)
+        out = []
+        for i, part in enumerate(parts):
+            if i > 0:
+                self.separator()
+            if not part:
+                continue
+            if self.pending and self.started:
+                out.append(self.pending)
+            self.pending = ""
+            self.started = True
+            out.append(part)
+        if out:
+            piece = "".join(out)
+            self.length += len(piece)
+            self.sink.write(piece)
+
+
+class _FilingEvents:
+    """
+    Cible d'événements au format "target" de lxml (start / end / data / comment / close).
+    Les morceaux de texte consécutifs sont regroupés avant d'être transmis à `on_text`,
+    quel que soit le découpage fait par le parser.
+    """
+
+    def __init__(self):
+        self._data = []
+
+    def _flush(self):
+        if self._data:
+            text = "".join(self._data)
+            self._data = []
+            self.on_text(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        self.on_start(tag.lower(), attrib)
+
+    def end(self, tag):
+        self._flush()
+        self.on_end(tag.lower())
+
+    def data(self, data):
+        self._data.append(data)
+
+    def comment(self, text):
+        self._flush()
+        self.on_comment()
+
+    def close(self):
+        self._flush()
+        return self
+
+    def on_start(self, tag, attrib):
+        pass
+
+    def on_end(self, tag):
+        pass
+
+    def on_text(self, text):
+        pass
+
+    def on_comment(self):
+        pass
+
+
+class _VisibleTextHandler(_FilingEvents):
+    """
+    Envoie le texte visible (hors script/style/table) au normaliseur, sans construire de DOM.
+    """
+
+    def __init__(self, normalizer: _TextNormalizer, skipped_tags=SKIPPED_TAGS):
+        super().__init__()
+        self.normalizer = normalizer
+        self.skipped_tags = skipped_tags
+        self.skip_depth = 0
+
+    def on_start(self, tag, attrib):
+        if tag in self.skipped_tags:
+            self.skip_depth += 1
+        self.normalizer.separator(tag in BLOCK_TAGS)
+
+    def on_end(self, tag):
+        if tag in self.skipped_tags and self.skip_depth > 0:
+            self.skip_depth -= 1
+        self.normalizer.separator(tag in BLOCK_TAGS)
+
+    def on_text(self, text):
+        if self.skip_depth == 0:
+            self.normalizer.write(text)
+
+    def on_comment(self):
+        self.normalizer.separator()
+
+
+class _StdlibDriver(HTMLParser):
+    """Tokenizer incrémental de la stdlib, branché sur une cible au format lxml."""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+    def close(self):
+        super().close()
+        return self.target.close()
+
+
+def _iter_chunks(source, chunk_size: int = CHUNK_SIZE):
+    """
+    Découpe la source (str, bytes ou objet fichier type body S3) en morceaux de texte.
+    """
+    if isinstance(source, str):
+        for i in range(0, len(source), chunk_size):
+            yield source[i:i + chunk_size]
+        return
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def feed_html(source, target, chunk_size: int = CHUNK_SIZE, use_lxml: bool = None):
+    """
+    Parse la source en un seul passage et envoie les événements à `target`.
+    Utilise le parser incrémental de lxml s'il est installé, sinon celui de la stdlib.
+    """
+    if use_lxml is None:
+        use_lxml = etree is not None
+
+    if use_lxml:
+        parser = etree.HTMLParser(target=target, encoding="utf-8")
+        for chunk in _iter_chunks(source, chunk_size):
+            parser.feed(chunk.encode("utf-8"))
+        return parser.close()
+
+    parser = _StdlibDriver(target)
+    for chunk in _iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+    return parser.close()
+
+
+def stream_visible_text(source, sink, chunk_size: int = CHUNK_SIZE):
+    """
+    Parse la source en un seul passage et envoie le texte visible normalisé à `sink.write`.
+    """
+    feed_html(source, _VisibleTextHandler(_TextNormalizer(sink)), chunk_size)
+    return sink
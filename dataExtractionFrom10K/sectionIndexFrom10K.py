@@ -0,0 +1,176 @@
+import os
+import re
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sectionExtractionFrom10K import stream_visible_text
+
+# Ordre canonique des Items d'un 10-K
+ITEM_ORDER = [
+    "1", "1A", "1B", "1C", "2", "3", "4",
+    "5", "6", "7", "7A", "8", "9", "9A", "9B", "9C",
+    "10", "11", "12", "13", "14", "15", "16",
+]
+ITEM_RANK = {item: rank for rank, item in enumerate(ITEM_ORDER)}
+
+# Items envoyés au résumé : Business, Risk Factors, Properties, MD&A
+RELEVANT_ITEMS = ["1", "1A", "2", "7"]
+
+# Deux entrées d'une table des matières sont rarement à plus de TOC_MAX_GAP caractères,
+# et une table des matières aligne au moins TOC_MIN_RUN Items consécutifs.
+TOC_MAX_GAP = 250
+TOC_MIN_RUN = 3
+
+# "ITEM 1A.", "Item 1A:", "ITEM1A", "Item 1 A -", mais pas "Item 10" pour "Item 1"
+_ITEM_RE = re.compile(r"(?<![A-Za-z0-9])(ITEM|Item|item)\s*(\d{1,2})(?:\s?([A-Ca-c]))?(?![A-Za-z0-9])")
+_XREF_WORDS = ("see", "in", "to", "under", "and", "or", "of", "also", "within", "this", "our")
+_XREF_AFTER_RE = re.compile(r"\s*(,|\)|of\b|and\b|or\b|in\b|through\b|to\b)", re.IGNORECASE)
+
+
+class _TextBuffer:
+    def __init__(self):
+        self.pieces = []
+
+    def write(self, text: str):
+        self.pieces.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.pieces)
+
+
+def extract_visible_text(source) -> str:
+    """
+    Texte visible normalisé d'un filing (hors script/style/table), en un seul passage.
+    Les offsets de l'index de sections se réfèrent à ce texte.
+    """
+    return stream_visible_text(source, _TextBuffer()).getvalue()
+
+
+def _is_cross_reference(text: str, match) -> bool:
+    # "see Item 1A", "in Part II, Item 7 of this report", '"Item 1A. Risk Factors"'
+    before = text[max(0, match.start() - 25):match.start()].rstrip()
+    if before.endswith(('"', "“", "'", "(")):
+        return True
+    if before.endswith(",") and match.group(1) != "ITEM":
+        return True
+    words = before.lower().split()
+    if words and words[-1] in _XREF_WORDS:
+        return True
+    return _XREF_AFTER_RE.match(text, match.end()) is not None
+
+
+def _find_candidates(text: str, skip_cross_references: bool = True) -> list[tuple[int, str]]:
+    candidates = []
+    for match in _ITEM_RE.finditer(text):
+        item = match.group(2) + (match.group(3) or "").upper()
+        if item not in ITEM_RANK:
+            continue
+        if skip_cross_references and _is_cross_reference(text, match):
+            continue
+        candidates.append((match.start(), item))
+    return candidates
+
+
+def _drop_table_of_contents(candidates: list[tuple[int, str]]) -> list[tuple[int, str]]:
+    """
+    Retire les tables des matières : suites d'Items rapprochés, en ordre croissant,
+    dont la plupart réapparaissent plus loin dans le document. Une suite s'arrête dès
+    que l'ordre des Items redescend, pour ne pas avaler le vrai "Item 1" qui suit la table.
+    """
+    runs = []
+    for position, item in candidates:
+        run = runs[-1] if runs else None
+        if run and position - run[-1][0] <= TOC_MAX_GAP and ITEM_RANK[item] > ITEM_RANK[run[-1][1]]:
+            run.append((position, item))
+        else:
+            runs.append([(position, item)])
+
+    # Les suites se parcourent de la fin vers le début : les Items vus plus loin dans le
+    # document s'accumulent dans un seul ensemble, au lieu d'être recalculés pour chaque suite
+    kept_runs = []
+    later_items = set()
+    for run in reversed(runs):
+        is_toc = False
+        if len(run) >= TOC_MIN_RUN:
+            repeated = sum(1 for _, item in run if item in later_items)
+            is_toc = repeated * 2 >= len(run)
+        if not is_toc:
+            kept_runs.append(run)
+        later_items.update(item for _, item in run)
+
+    return [heading for run in reversed(kept_runs) for heading in run]
+
+
+def _longest_item_chain(candidates: list[tuple[int, str]]) -> list[tuple[int, str]]:
+    """
+    Plus longue suite de titres dont les Items sont dans l'ordre canonique.
+    À longueur égale, on garde l'occurrence la plus tôt de chaque Item : un renvoi
+    ("as described in this Item 1A") vient toujours après le vrai titre.
+
+    Les Items ne prennent que len(ITEM_ORDER) valeurs : on garde, pour chaque Item, la
+    meilleure suite qui s'y termine (longueur, premier titre qui l'atteint). Chaque titre
+    ne regarde donc que les Items précédents, et non tous les titres vus : O(n × 23), même
+    pour un document avec des centaines de milliers de titres.
+    """
+    if not candidates:
+        return []
+
+    previous = [-1] * len(candidates)
+    # Par rang d'Item : (longueur de la meilleure suite qui s'y termine, indice de son dernier titre)
+    best_by_rank = [(0, -1)] * len(ITEM_ORDER)
+    best = (0, -1)
+
+    for i, (_, item) in enumerate(candidates):
+        rank = ITEM_RANK[item]
+        length, j = 0, -1
+        for rank_length, rank_index in best_by_rank[:rank]:
+            if rank_length > length or (rank_length == length and rank_length and rank_index < j):
+                length, j = rank_length, rank_index
+        previous[i] = j
+        if length + 1 > best_by_rank[rank][0]:
+            best_by_rank[rank] = (length + 1, i)
+        if length + 1 > best[0]:
+            best = (length + 1, i)
+
+    i = best[1]
+    chain = []
+    while i != -1:
+        chain.append(candidates[i])
+        i = previous[i]
+    return chain[::-1]
+
+
+def build_section_index(text: str) -> list[dict]:
+    """
+    Construit l'index des Items d'un 10-K : une entrée {"item", "start", "end"} par titre
+    retenu, les offsets se référant à `text` (voir extract_visible_text).
+    Gère les doublons de la table des matières, les collisions "Item 1" / "Item 1A"
+    et les variantes d'espacement ou de ponctuation.
+    """
+    candidates = _drop_table_of_contents(_find_candidates(text))
+    if not candidates:
+        candidates = _find_candidates(text, skip_cross_references=False)
+
+    chain = _longest_item_chain(candidates)
+
+    index = []
+    for k, (position, item) in enumerate(chain):
+        end = chain[k + 1][0] if k + 1 < len(chain) else len(text)
+        index.append({"item": item, "start": position, "end": end})
+    return index
+
+
+def slice_section(text: str, index: list[dict], item: str) -> str:
+    for entry in index:
+        if entry["item"] == item:
+            return text[entry["start"]:entry["end"]]
+    return ""
+
+
+def join_sections(text: str, index: list[dict], items=RELEVANT_ITEMS) -> str:
+    """Texte des Items demandés, dans l'ordre de `items`, séparés par une ligne vide."""
+    sections = [slice_section(text, index, item).strip() for item in items]
+    return "\n\n".join([s for s in sections if s != ""])
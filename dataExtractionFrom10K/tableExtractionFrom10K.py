@@ -1,25 +1,241 @@
-from bs4 import BeautifulSoup
-import boto3
-import instructor
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
 
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
 
-def extract_only_tables(html_text: str) -> str:
+from parsedFiling import parse_filing
+
+
+def extract_only_tables(filing) -> str:
     """
     Extrait uniquement le contenu des balises <table> d’un document HTML (10-K),
     et renvoie le tout en texte lisible.
+
+    Args:
+        filing: un ParsedFiling déjà parsé, ou le HTML brut (str, bytes ou body S3).
     """
-    soup = BeautifulSoup(html_text, "html.parser")
+    if isinstance(filing, (str, bytes)) or hasattr(filing, "read"):
+        filing = parse_filing(filing)
 
-    tables = soup.find_all("table")
     extracted_tables = []
 
-    for table in tables:
-        rows_text = []
-        for row in table.find_all("tr"):
-            cells = [cell.get_text(" ", strip=True) for cell in row.find_all(["th", "td"])]
-            if cells:
-                rows_text.append("\t".join(cells))
+    for table in filing.tables:
+        rows_text = ["\t".join(cells) for cells in table["rows"] if cells]
         if rows_text:
             extracted_tables.append("[TABLE]\n" + "\n".join(rows_text) + "\n[/TABLE]")
 
     return "\n\n".join(extracted_tables).strip()
+
+
+# Tableaux gardés pour l'extraction numérique
+FINANCIAL_STATEMENTS = ("income_statement", "balance_sheet", "cash_flow")
+
+# Libellés de lignes caractéristiques de chaque état financier
+STATEMENT_KEYWORDS = {
+    "income_statement": [
+        "net sales", "revenue", "cost of sales", "cost of revenue", "cost of goods sold", "gross margin",
+        "gross profit", "operating income", "income from operations", "operating expenses",
+        "provision for income taxes", "income before", "net income", "earnings per share", "per share",
+    ],
+    "balance_sheet": [
+        "total assets", "total current assets", "total liabilities", "total current liabilities",
+        "shareholders' equity", "stockholders' equity", "cash and cash equivalents", "accounts receivable",
+        "inventories", "retained earnings", "property, plant and equipment", "accounts payable",
+    ],
+    "cash_flow": [
+        "operating activities", "investing activities", "financing activities", "depreciation and amortization",
+        "cash generated by", "net cash provided by", "net cash used in", "share-based compensation",
+        "purchases of", "proceeds from", "cash paid for",
+    ],
+}
+
+# Titres des états financiers, cherchés dans le texte qui précède le tableau
+STATEMENT_TITLES = {
+    "income_statement": ["statements of operations", "statements of income", "statements of earnings"],
+    "balance_sheet": ["balance sheets", "statements of financial position", "balance sheet"],
+    "cash_flow": ["statements of cash flows", "cash flows"],
+}
+
+SCALES = {"thousand": 1e3, "million": 1e6, "billion": 1e9}
+CONTEXT_CHARS = 400
+MIN_STATEMENT_SCORE = 3
+
+_SCALE_RE = re.compile(r"in (thousands|millions|billions)", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"^\(?\s*\$?\s*\(?\s*(\d[\d,]*(?:\.\d+)?)\s*\)?\s*%?$")
+_DASH_RE = re.compile(r"^[—–\-]+$")
+_YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_UNSCALED_LABEL_RE = re.compile(r"per (common |diluted |basic )?share|%|percent|ratio", re.IGNORECASE)
+# "(In millions, except number of shares, which are reflected in thousands, ...)"
+_SHARES_SCALE_RE = re.compile(r"shares[^)]*?in (thousands|millions|billions)", re.IGNORECASE)
+
+# Libellés trop génériques pour être lus seuls : préfixés par le titre de groupe
+# qui les précède ("Earnings per share:" → "Earnings per share: Diluted")
+GENERIC_LABELS = {"basic", "diluted", "products", "services", "total"}
+
+
+class FinancialTable:
+    """
+    Tableau d'un 10-K converti en DataFrame : une ligne par libellé, une colonne par période,
+    valeurs en unités pleines ("in millions" déjà appliqué, sauf montants par action et %).
+    """
+
+    def __init__(self, frame: pd.DataFrame, kind: str, scale: float, context: str, offset: int):
+        self.frame = frame
+        self.kind = kind
+        self.scale = scale
+        self.context = context
+        self.offset = offset
+
+    def to_prompt(self) -> str:
+        lines = [f"[{self.kind.upper()}]", " | ".join(["label"] + [str(c) for c in self.frame.columns])]
+        for label, values in zip(self.frame.index, self.frame.to_numpy()):
+            cells = ["" if np.isnan(v) else f"{v:.0f}" if v.is_integer() else f"{v:g}" for v in values]
+            lines.append(" | ".join([label] + cells))
+        return "\n".join(lines)
+
+
+def parse_number(cell: str):
+    """
+    "$ 1,234" → 1234.0, "(1,234)" → -1234.0, "—" → 0.0, texte → None.
+    """
+    cell = cell.strip()
+    if _DASH_RE.match(cell):
+        return 0.0
+    match = _NUMBER_RE.match(cell)
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    return -value if "(" in cell else value
+
+
+def _split_row(cells: list[str]) -> tuple[str, list[float]]:
+    label = ""
+    values = []
+    for cell in cells:
+        if not label and re.search(r"[A-Za-z]", cell) and parse_number(cell) is None:
+            label = cell
+            continue
+        value = parse_number(cell)
+        if value is not None:
+            values.append(value)
+    return label, values
+
+
+def detect_scale(text: str) -> float:
+    match = _SCALE_RE.search(text)
+    if not match:
+        return 1.0
+    return SCALES[match.group(1).lower().rstrip("s")]
+
+
+def classify_table(labels: list[str], context: str = ""):
+    """
+    Renvoie "income_statement", "balance_sheet", "cash_flow" ou None selon les libellés
+    de lignes (et le titre de l'état financier s'il précède le tableau).
+    """
+    joined = "\n".join(labels).lower().replace("’", "'")
+    context = context.lower().replace("’", "'")
+
+    scores = {}
+    for kind, keywords in STATEMENT_KEYWORDS.items():
+        score = sum(1 for k in keywords if k in joined)
+        if any(title in context for title in STATEMENT_TITLES[kind]):
+            score += 2
+        scores[kind] = score
+
+    kind = max(scores, key=scores.get)
+    return kind if scores[kind] >= MIN_STATEMENT_SCORE else None
+
+
+def structure_table(table: dict, context: str = "") -> FinancialTable:
+    """
+    Convertit un tableau brut (lignes de cellules) en FinancialTable : en-têtes de colonnes
+    (années), échelle, valeurs numériques, avec les négatifs entre parenthèses.
+    """
+    header_rows = []
+    labels = []
+    rows = []
+    group = ""
+    for cells in table["rows"]:
+        label, values = _split_row(cells)
+        if not values or (not label and _YEAR_RE.search(" ".join(cells))):
+            if label.endswith(":") or (rows and label):
+                group = label.rstrip(":")
+            elif not rows:
+                header_rows.append(cells)
+            continue
+        if group and label.lower() in GENERIC_LABELS:
+            label = f"{group}: {label}"
+        labels.append(label)
+        rows.append(values)
+
+    width = max((len(v) for v in rows), default=0)
+    years = max(
+        ([y for y in _YEAR_RE.findall(" ".join(cells))] for cells in header_rows),
+        key=len,
+        default=[],
+    )
+    columns = years if len(years) == width else [f"col_{i}" for i in range(width)]
+
+    header_text = " ".join(" ".join(cells) for cells in header_rows)
+    scale_text = header_text if _SCALE_RE.search(header_text) else context
+    scale = detect_scale(scale_text)
+    shares_match = _SHARES_SCALE_RE.search(scale_text)
+    shares_scale = SCALES[shares_match.group(1).lower().rstrip("s")] if shares_match else scale
+
+    matrix = np.full((len(rows), width), np.nan)
+    for i, (label, values) in enumerate(zip(labels, rows)):
+        if "shares" in label.lower():
+            factor = shares_scale
+        elif _UNSCALED_LABEL_RE.search(label):
+            factor = 1.0
+        else:
+            factor = scale
+        matrix[i, :len(values)] = np.array(values) * factor
+
+    frame = pd.DataFrame(matrix, index=labels, columns=columns)
+    return FinancialTable(frame, classify_table(labels, context + " " + header_text), scale, context, table["offset"])
+
+
+def extract_structured_tables(filing, keep_kinds=FINANCIAL_STATEMENTS) -> list[FinancialTable]:
+    """
+    Tableaux structurés des états financiers (compte de résultat, bilan, flux de trésorerie).
+    Si l'Item 8 est repéré et contient des états financiers, seuls ceux-là sont gardés
+    (les tableaux de MD&A reprennent souvent les mêmes lignes).
+    """
+    if isinstance(filing, (str, bytes)) or hasattr(filing, "read"):
+        filing = parse_filing(filing)
+
+    def structured(tables):
+        result = []
+        for table in tables:
+            context = filing.text[max(0, table["offset"] - CONTEXT_CHARS):table["offset"]]
+            financial_table = structure_table(table, context)
+            if financial_table.kind in keep_kinds and not financial_table.frame.empty:
+                result.append(financial_table)
+        return result
+
+    return structured(filing.tables_in("8")) or structured(filing.tables)
+
+
+def format_tables_for_prompt(tables: list[FinancialTable]) -> str:
+    return "\n\n".join(t.to_prompt() for t in tables)
+
+
+def extract_financial_tables_text(filing) -> str:
+    """
+    Texte compact des seuls états financiers, pour getNumericalFrom10K. Retombe sur
+    l'ensemble des tableaux si aucun état financier n'est reconnu.
+    """
+    if isinstance(filing, (str, bytes)) or hasattr(filing, "read"):
+        filing = parse_filing(filing)
+
+    tables = extract_structured_tables(filing)
+    if not tables:
+        return extract_only_tables(filing)
+    return format_tables_for_prompt(tables)
@@ -0,0 +1,174 @@
+import re
+from pydantic import BaseModel
+
+# Budget d'entrée par défaut pour un appel de résumé (tokens estimés)
+INPUT_TOKEN_BUDGET = 60000
+# Au-delà, le texte ne tient plus dans une seule fenêtre de contexte (prompt et réponse compris)
+CONTEXT_WINDOW_TOKENS = 180000
+
+# Approximation locale d'un tokenizer BPE : ~1 token par tranche de 4 caractères
+# alphanumériques, 1 token par signe de ponctuation.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_HEADING_RE = re.compile(r"^\s*(PART\s+[IV]+|ITEM\s*\d{1,2}[A-C]?)\b", re.IGNORECASE)
+
+# Mots-clés (racines, en minuscules) associés aux champs de Company10k
+FIELD_KEYWORDS = {
+    "business_resume": ["we are", "company", "products", "services", "markets", "segment", "customers"],
+    "business_model": ["revenue", "net sales", "sales of", "subscription", "fees", "licens", "pricing", "margin"],
+    "risk_factor": ["risk", "adverse", "uncertain", "regulat", "litigation", "competition", "volatil", "cyber"],
+    "property": ["propert", "facilit", "headquarter", "plant", "warehouse", "data center", "office", "square feet", "lease"],
+    "sector": ["industry", "sector", "segment", "market"],
+    "sub_sector": ["semiconductor", "software", "cloud", "retail", "banking", "pharma", "energy", "manufactur"],
+    "country_headquarters": ["headquarter", "incorporated", "principal executive office"],
+    "country_of_production": ["manufactur", "production", "assembl", "supplier", "contract manufacturer", "foundr"],
+    "country_of_operation": ["countries", "international", "operations in", "subsidiar", "region", "global"],
+    "country_of_ressource": ["raw material", "sourc", "commodit", "mineral", "supply chain", "rare earth"],
+    "client_country": ["americas", "europe", "asia", "china", "japan", "united states", "geographic", "emea", "apac"],
+    "client_type": ["consumer", "enterprise", "government", "business customers", "small and medium", "public sector"],
+}
+
+
+class PackingMetrics(BaseModel):
+    input_tokens: int
+    kept_tokens: int
+    input_chars: int
+    kept_chars: int
+    paragraphs: int
+    kept_paragraphs: int
+    token_budget: int
+    chunks: int = 1
+
+    @property
+    def dropped_ratio(self) -> float:
+        if self.input_tokens == 0:
+            return 0.0
+        return 1 - self.kept_tokens / self.input_tokens
+
+    def summary(self) -> str:
+        summary = (
+            f"{self.kept_tokens}/{self.input_tokens} tokens, "
+            f"{self.kept_paragraphs}/{self.paragraphs} paragraphes "
+            f"({self.dropped_ratio:.0%} du texte écarté, budget {self.token_budget})"
+        )
+        if self.chunks > 1:
+            summary += f", {self.chunks} chunks"
+        return summary
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def split_paragraphs(text: str, min_chars: int = 300) -> list[str]:
+    """
+    Découpe le texte sur les retours à la ligne, en regroupant les lignes trop courtes
+    (titres, puces) avec les suivantes pour obtenir des paragraphes exploitables.
+    """
+    paragraphs = []
+    current = []
+    current_len = 0
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if _HEADING_RE.match(line) and current:
+            paragraphs.append("\n".join(current))
+            current, current_len = [], 0
+        current.append(line)
+        current_len += len(line)
+        if current_len >= min_chars:
+            paragraphs.append("\n".join(current))
+            current, current_len = [], 0
+    if current:
+        paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def relevance_score(paragraph: str, tokens: int) -> float:
+    """
+    Pertinence d'un paragraphe pour les champs de Company10k : nombre de champs couverts
+    et densité de mots-clés (plafonnée par champ pour ne pas favoriser les répétitions).
+    """
+    lower = paragraph.lower()
+    covered = 0
+    hits = 0
+    for keywords in FIELD_KEYWORDS.values():
+        field_hits = sum(lower.count(k) for k in keywords)
+        if field_hits:
+            covered += 1
+            hits += min(field_hits, 3)
+    return (covered + hits / 3) / max(tokens, 1) ** 0.5
+
+
+def pack_text(text: str, token_budget: int = INPUT_TOKEN_BUDGET) -> tuple[str, PackingMetrics]:
+    """
+    Garde les paragraphes les plus pertinents sous `token_budget` tokens estimés,
+    dans leur ordre d'origine. Les titres (PART / ITEM) sont toujours conservés.
+    """
+    paragraphs = split_paragraphs(text)
+    token_counts = [estimate_tokens(p) for p in paragraphs]
+    input_tokens = sum(token_counts)
+
+    if input_tokens <= token_budget:
+        kept = list(range(len(paragraphs)))
+    else:
+        priority = sorted(
+            range(len(paragraphs)),
+            key=lambda i: (
+                not _HEADING_RE.match(paragraphs[i]),
+                -relevance_score(paragraphs[i], token_counts[i]),
+            ),
+        )
+        kept = []
+        used = 0
+        for i in priority:
+            if used + token_counts[i] <= token_budget:
+                kept.append(i)
+                used += token_counts[i]
+        kept.sort()
+
+    packed = "\n".join(paragraphs[i] for i in kept)
+    metrics = PackingMetrics(
+        input_tokens=input_tokens,
+        kept_tokens=sum(token_counts[i] for i in kept),
+        input_chars=len(text),
+        kept_chars=len(packed),
+        paragraphs=len(paragraphs),
+        kept_paragraphs=len(kept),
+        token_budget=token_budget,
+    )
+    return packed, metrics
+
+
+def chunk_text(text: str, token_budget: int = INPUT_TOKEN_BUDGET) -> tuple[list[str], PackingMetrics]:
+    """
+    Découpe le texte en chunks de paragraphes consécutifs d'au plus `token_budget` tokens
+    estimés, sans rien écarter. Un paragraphe plus gros que le budget forme son propre chunk.
+    """
+    paragraphs = split_paragraphs(text)
+    chunks = []
+    current = []
+    used = 0
+    input_tokens = 0
+    for paragraph in paragraphs:
+        tokens = estimate_tokens(paragraph)
+        input_tokens += tokens
+        if current and used + tokens > token_budget:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        current.append(paragraph)
+        used += tokens
+    if current:
+        chunks.append("\n".join(current))
+
+    metrics = PackingMetrics(
+        input_tokens=input_tokens,
+        kept_tokens=input_tokens,
+        input_chars=len(text),
+        kept_chars=sum(len(c) for c in chunks),
+        paragraphs=len(paragraphs),
+        kept_paragraphs=len(paragraphs),
+        token_budget=token_budget,
+        chunks=len(chunks),
+    )
+    return chunks, metrics
@@ -0,0 +1,292 @@
+import os
+import re
+import sys
+from datetime import date
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sectionExtractionFrom10K import _FilingEvents, feed_html
+
+# Concepts us-gaap candidats par champ de Numerical_10K, par ordre de préférence
+FIELD_CONCEPTS = {
+    "revenue": [
+        "us-gaap:Revenues",
+        "us-gaap:RevenueFromContractWithCustomerExcludingAssessedTax",
+        "us-gaap:RevenueFromContractWithCustomerIncludingAssessedTax",
+        "us-gaap:SalesRevenueNet",
+    ],
+    "net_income": ["us-gaap:NetIncomeLoss", "us-gaap:ProfitLoss", "us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic"],
+    "operating_income": ["us-gaap:OperatingIncomeLoss"],
+    "cost_of_good_sold": ["us-gaap:CostOfGoodsAndServicesSold", "us-gaap:CostOfRevenue", "us-gaap:CostOfGoodsSold"],
+    "eps": ["us-gaap:EarningsPerShareDiluted", "us-gaap:EarningsPerShareBasic"],
+    "average_of_CS": [
+        "us-gaap:WeightedAverageNumberOfDilutedSharesOutstanding",
+        "us-gaap:WeightedAverageNumberOfSharesOutstandingBasic",
+    ],
+    "total_asset": ["us-gaap:Assets"],
+    "asset_current": ["us-gaap:AssetsCurrent"],
+    "liabilities_current": ["us-gaap:LiabilitiesCurrent"],
+    "she": ["us-gaap:StockholdersEquity", "us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest"],
+    "inventory": ["us-gaap:InventoryNet", "us-gaap:InventoryGross"],
+    "preferred_dividend": ["us-gaap:PreferredStockDividendsIncomeStatementImpact", "us-gaap:DividendsPreferredStock"],
+    "corporate_tax_rate": ["us-gaap:EffectiveIncomeTaxRateContinuingOperations"],
+    "income_tax": ["us-gaap:IncomeTaxExpenseBenefit"],
+    "pretax_income": [
+        "us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest",
+        "us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments",
+    ],
+    "interest_expense": ["us-gaap:InterestExpense", "us-gaap:InterestExpenseDebt"],
+}
+
+# Composantes de la dette : total si publié, sinon parts courante et non courante
+DEBT_TOTAL_CONCEPTS = ["us-gaap:LongTermDebt", "us-gaap:DebtLongtermAndShorttermCombinedAmount"]
+DEBT_PART_CONCEPTS = ["us-gaap:LongTermDebtCurrent", "us-gaap:LongTermDebtNoncurrent"]
+SHORT_DEBT_CONCEPTS = ["us-gaap:CommercialPaper", "us-gaap:ShortTermBorrowings"]
+
+# Un exercice annuel dure entre ~50 et ~54 semaines
+ANNUAL_DAYS = (340, 380)
+
+_DIGITS_RE = re.compile(r"[^\d.]")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit(":", 1)[-1]
+
+
+def parse_ixbrl_value(text: str, fmt: str = "", scale: str = None, sign: str = None):
+    """
+    Valeur d'un ix:nonFraction : format ixt (point ou virgule décimale, zéro en tiret),
+    puissance de 10 `scale` et attribut `sign="-"`. Renvoie None si illisible.
+    """
+    fmt = (fmt or "").lower()
+    text = text.strip()
+    if "comma" in fmt and "decimal" in fmt:
+        text = text.replace(".", "").replace(" ", "").replace(",", ".")
+    text = _DIGITS_RE.sub("", text)
+    if not text:
+        if "zero" in fmt or "dash" in fmt or "numwords" in fmt:
+            return 0.0
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    if scale:
+        value *= 10 ** int(scale)
+    return -value if sign == "-" else value
+
+
+class _XbrlCollector:
+    """
+    Collecte les faits iXBRL (ix:nonFraction), les contextes et les unités au fil des
+    événements du parser. S'utilise seul ou branché sur un autre handler du même passage.
+    """
+
+    def __init__(self):
+        self.raw_facts = []
+        self.contexts = {}
+        self.units = {}
+        self._open_facts = []
+        self._context = None
+        self._unit = None
+        self._field = None
+        self._text = []
+
+    def on_start(self, tag, attrib):
+        name = _local(tag)
+        attrib = {_local(k.lower()): v for k, v in attrib.items()}
+        if name == "nonfraction":
+            self._open_facts.append({"attrib": attrib, "text": []})
+        elif name == "context":
+            self._context = {"id": attrib.get("id"), "start": None, "end": None, "dimensional": False}
+        elif name == "unit":
+            self._unit = {"id": attrib.get("id"), "measures": []}
+        elif self._context is not None and name in ("segment", "scenario"):
+            self._context["dimensional"] = True
+        elif name in ("startdate", "enddate", "instant", "measure"):
+            self._field = name
+            self._text = []
+
+    def on_end(self, tag):
+        name = _local(tag)
+        if name == "nonfraction" and self._open_facts:
+            fact = self._open_facts.pop()
+            self.raw_facts.append({"attrib": fact["attrib"], "text": "".join(fact["text"])})
+        elif name == "context" and self._context is not None:
+            self.contexts[self._context["id"]] = self._context
+            self._context = None
+        elif name == "unit" and self._unit is not None:
+            self.units[self._unit["id"]] = "/".join(self._unit["measures"])
+            self._unit = None
+        elif name == self._field:
+            value = "".join(self._text).strip()
+            if name == "measure" and self._unit is not None:
+                self._unit["measures"].append(value)
+            elif self._context is not None:
+                self._context["start" if name == "startdate" else "end"] = value
+            self._field = None
+
+    def on_text(self, text):
+        for fact in self._open_facts:
+            fact["text"].append(text)
+        if self._field is not None:
+            self._text.append(text)
+
+    def facts(self) -> list[dict]:
+        """
+        Faits résolus {"concept", "start", "end", "unit", "value"}, hors contextes
+        dimensionnels (segments, scénarios) : seuls les montants consolidés sont gardés.
+        """
+        facts = []
+        for raw in self.raw_facts:
+            attrib = raw["attrib"]
+            if attrib.get("nil") == "true":
+                continue
+            context = self.contexts.get(attrib.get("contextref"))
+            if context is None or context["dimensional"] or not context["end"]:
+                continue
+            value = parse_ixbrl_value(raw["text"], attrib.get("format"), attrib.get("scale"), attrib.get("sign"))
+            if value is None:
+                continue
+            facts.append({
+                "concept": attrib.get("name"),
+                "start": context["start"],
+                "end": context["end"],
+                "unit": self.units.get(attrib.get("unitref"), attrib.get("unitref")),
+                "value": value,
+            })
+        return facts
+
+
+class _XbrlHandler(_FilingEvents):
+    def __init__(self):
+        super().__init__()
+        self.collector = _XbrlCollector()
+
+    def on_start(self, tag, attrib):
+        self.collector.on_start(tag, attrib)
+
+    def on_end(self, tag):
+        self.collector.on_end(tag)
+
+    def on_text(self, text):
+        self.collector.on_text(text)
+
+
+def extract_xbrl_facts(source) -> list[dict]:
+    """Faits iXBRL d'un filing (str, bytes ou body S3), en un seul passage sans texte ni DOM."""
+    handler = _XbrlHandler()
+    feed_html(source, handler)
+    return handler.collector.facts()
+
+
+class XbrlFactIndex:
+    """
+    Index des faits iXBRL par (concept, période, unité). La période vaut "AAAA-MM-JJ"
+    pour un solde (instant) et "début/fin" pour un flux (durée).
+    """
+
+    def __init__(self, facts: list[dict]):
+        self.facts = {}
+        for fact in facts:
+            period = f"{fact['start']}/{fact['end']}" if fact["start"] else fact["end"]
+            self.facts.setdefault((fact["concept"], period, fact["unit"]), fact)
+
+    def __len__(self):
+        return len(self.facts)
+
+    def get(self, concept: str, period: str, unit: str = None):
+        if unit is not None:
+            fact = self.facts.get((concept, period, unit))
+            return fact["value"] if fact else None
+        for (c, p, _), fact in self.facts.items():
+            if c == concept and p == period:
+                return fact["value"]
+        return None
+
+    def series(self, concept: str, annual: bool = True) -> list[float]:
+        """
+        Valeurs d'un concept de la période la plus récente à la plus ancienne. Pour les flux,
+        seules les durées annuelles sont gardées (pas les trimestres des 10-K).
+        """
+        by_end = {}
+        for (c, _, _), fact in self.facts.items():
+            if c != concept:
+                continue
+            if fact["start"] and annual:
+                days = (date.fromisoformat(fact["end"]) - date.fromisoformat(fact["start"])).days
+                if not ANNUAL_DAYS[0] <= days <= ANNUAL_DAYS[1]:
+                    continue
+            by_end.setdefault(fact["end"], fact["value"])
+        return [by_end[end] for end in sorted(by_end, reverse=True)]
+
+    def latest(self, concepts: list[str], position: int = 0):
+        """Valeur du premier concept disponible, pour la période la plus récente (0) ou la précédente (1)."""
+        for concept in concepts:
+            values = self.series(concept)
+            if len(values) > position:
+                return values[position]
+        return None
+
+    def has_prefix(self, prefix: str) -> bool:
+        return any(c.startswith(prefix) for c, _, _ in self.facts)
+
+
+def extract_numerical_from_xbrl(facts) -> dict:
+    """
+    Champs de Numerical_10K lus dans les faits iXBRL (liste de faits ou XbrlFactIndex).
+    Les champs sans fait correspondant sont absents du résultat.
+    """
+    index = facts if isinstance(facts, XbrlFactIndex) else XbrlFactIndex(facts)
+    if not len(index):
+        return {}
+
+    values = {}
+    for field in ("net_income", "operating_income", "cost_of_good_sold", "average_of_CS",
+                  "total_asset", "asset_current", "liabilities_current", "she", "corporate_tax_rate"):
+        value = index.latest(FIELD_CONCEPTS[field])
+        if value is not None:
+            values[field] = value
+
+    for field, position in (("revenue", 0), ("revenue_current", 0), ("revenue_previous", 1)):
+        value = index.latest(FIELD_CONCEPTS["revenue"], position)
+        if value is not None:
+            values[field] = value
+
+    for field, position in (("eps_current", 0), ("eps_previous", 1)):
+        value = index.latest(FIELD_CONCEPTS["eps"], position)
+        if value is not None:
+            values[field] = value
+
+    inventory = [index.latest(FIELD_CONCEPTS["inventory"], position) for position in (0, 1)]
+    if inventory[0] is not None:
+        values["inventory_avg"] = (inventory[0] + inventory[1]) / 2 if inventory[1] is not None else inventory[0]
+
+    debt = index.latest(DEBT_TOTAL_CONCEPTS)
+    if debt is None:
+        parts = [index.latest([c]) for c in DEBT_PART_CONCEPTS]
+        debt = sum(p for p in parts if p is not None) if any(p is not None for p in parts) else None
+    short_debt = [index.latest([c]) for c in SHORT_DEBT_CONCEPTS]
+    if debt is not None or any(d is not None for d in short_debt):
+        values["total_debt"] = (debt or 0) + sum(d for d in short_debt if d is not None)
+
+    # Coût de la dette : charge d'intérêts / dette totale, comme dataExtractionFromYahoo
+    interest = index.latest(FIELD_CONCEPTS["interest_expense"])
+    if interest is not None and values.get("total_debt"):
+        values["cost_of_debt"] = abs(interest) / values["total_debt"]
+
+    if "corporate_tax_rate" not in values:
+        tax = index.latest(FIELD_CONCEPTS["income_tax"])
+        pretax = index.latest(FIELD_CONCEPTS["pretax_income"])
+        if tax is not None and pretax:
+            values["corporate_tax_rate"] = tax / pretax
+
+    preferred = index.latest(FIELD_CONCEPTS["preferred_dividend"])
+    if preferred is not None:
+        values["preferred_dividend"] = preferred
+    elif not index.has_prefix("us-gaap:PreferredStock"):
+        values["preferred_dividend"] = 0.0
+
+    return values
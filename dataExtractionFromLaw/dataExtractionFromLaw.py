@@ -1,12 +1,51 @@
 import boto3
 import instructor
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pydantic import BaseModel
 
-from dataExtractionFromLaw.dataTranslateLaw import detect_language, translate_html_file
+from dataExtractionFrom10K.tokenBudget10K import chunk_text, estimate_tokens
+from dataExtractionFromLaw.dataTranslateLaw import detect_language, translate_plain_text
+from dataExtractionFromLaw.lawIngestion import ingest_law
+from dataExtractionFromLaw.lawSummaryCache import LawSummaryCache, default_backend
+from llmScheduler.llmScheduler import ScheduledClient
 
 s3 = boto3.client("s3")
 bedrock_client = boto3.client('bedrock-runtime')
-client = instructor.from_bedrock(bedrock_client)
+# Tous les appels passent par l'ordonnanceur partagé (quotas, concurrence adaptative, relances)
+client = ScheduledClient(instructor.from_bedrock(bedrock_client))
+
+LAW_MODEL_ID = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
+# À incrémenter à chaque modification du prompt, du modèle Law ou du découpage/fusion
+# des lois longues : les résumés en cache d'une autre version ne sont plus utilisés
+# v2 : résumé par morceaux (split_law / merge_laws)
+LAW_PROMPT_VERSION = 2
+
+law_cache = LawSummaryCache(default_backend(), LAW_MODEL_ID, LAW_PROMPT_VERSION)
+
+# Traduction Amazon Translate des lois non anglaises avant extraction : désactivée par défaut
+# (coût et latence), le modèle lit directement le texte d'origine
+TRANSLATE_LAWS = os.environ.get("TRANSLATE_LAWS", "0") == "1"
+# Résumés obtenus à partir du texte traduit, rangés à part
+translated_law_cache = LawSummaryCache(default_backend(), f"{LAW_MODEL_ID}+translate", LAW_PROMPT_VERSION)
+
+# Au-delà de LAW_SINGLE_CALL_TOKENS, la loi est découpée par articles en chunks
+# d'au plus LAW_CHUNK_TOKENS, extraits en parallèle puis fusionnés localement
+LAW_SINGLE_CALL_TOKENS = 40000
+LAW_CHUNK_TOKENS = 15000
+LAW_CHUNK_WORKERS = 8
+
+# Début d'un article, chapitre, titre, section ou annexe (texte d'origine, non traduit par défaut)
+_ARTICLE_RE = re.compile(
+    r"^[ \t]*(?:Article|ARTICLE|Art\.|Artikel|ARTIKEL|Artículo|ARTÍCULO|Articolo|ARTICOLO"
+    r"|Chapter|CHAPTER|Chapitre|CHAPITRE|Kapitel|KAPITEL|Title|TITLE|Titre|TITRE"
+    r"|Section|SECTION|Annex|ANNEX|Annexe|ANNEXE|Anhang|ANHANG)[ \t]+[\dIVXLC]+(?:er|re)?\b"
+    r"|^[ \t]*第[一二三四五六七八九十百千零〇\d]+[条章节]",
+    re.MULTILINE,
+)
+_DATE_FORMATS = ("%Y-%m-%d", "%d %B %Y", "%B %d, %Y", "%B %d %Y", "%d/%m/%Y", "%B %Y", "%Y")
 
 
 class Law(BaseModel):
@@ -21,16 +60,56 @@ class Law(BaseModel):
     revision_probability: float
 
 
-def getLawInformations(file) -> Law:
-    text_of_law = file.read().decode("utf-8")
+def getLawInformations(file, filename: str = None, use_cache: bool = True, translate: bool = TRANSLATE_LAWS) -> Law:
+    # Texte propre (sans balises) quel que soit le format : html, xml, pdf, docx, json, csv, txt
+    text_of_law = ingest_law(file, filename)
 
-    #detected_lang = detect_language(text_of_law)
+    # Même texte, même prompt, même modèle : le résumé déjà calculé est renvoyé tel quel
+    cache = translated_law_cache if translate else law_cache
+    if use_cache:
+        cached = cache.get(text_of_law)
+        if cached is not None:
+            print("⚡ Résumé de la loi trouvé dans le cache")
+            return Law(**cached)
 
-    #if detected_lang != "en":
-        #text_of_law = translate_html_file(text_of_law)
+    law = getLawInformationsFromText(text_of_law, translate=translate)
 
+    if use_cache:
+        cache.put(text_of_law, law.model_dump())
+    return law
+
+
+def getLawInformationsFromText(text_of_law: str, chunked: bool = None, translate: bool = TRANSLATE_LAWS) -> Law:
+    """
+    Args:
+        chunked (bool): True → la loi est découpée par articles, chaque chunk est extrait en
+            parallèle puis les résultats sont fusionnés (merge_laws), False → un seul appel,
+            None → découpage seulement au-delà de LAW_SINGLE_CALL_TOKENS tokens estimés.
+        translate (bool): traduit d'abord en anglais les textes détectés comme non anglais
+            (détection locale, sans appel réseau).
+    """
+    if translate:
+        detected_lang = detect_language(text_of_law)
+        if detected_lang not in ("en", "auto"):
+            text_of_law = translate_plain_text(text_of_law, source_lang=detected_lang)
+
+    if chunked is None:
+        chunked = estimate_tokens(text_of_law) > LAW_SINGLE_CALL_TOKENS
+
+    if chunked:
+        chunks = split_law(text_of_law)
+        if len(chunks) > 1:
+            print(f"🧩 Loi découpée en {len(chunks)} chunks, extraits en parallèle")
+            with ThreadPoolExecutor(max_workers=LAW_CHUNK_WORKERS) as executor:
+                partials = list(executor.map(summarizeLawChunk, chunks))
+            return merge_laws(partials)
+
+    return summarizeLawChunk(text_of_law)
+
+
+def summarizeLawChunk(text_of_law: str) -> Law:
     response = client.chat.completions.create(
-        modelId="global.anthropic.claude-haiku-4-5-20251001-v1:0",
+        modelId=LAW_MODEL_ID,
         messages=[
             {
                 "role": "user",
@@ -79,9 +158,91 @@ def getLawInformations(file) -> Law:
     return response
 
 
+def split_law(text_of_law: str, token_budget: int = LAW_CHUNK_TOKENS) -> list[str]:
+    """
+    Découpe la loi aux débuts d'articles (ou de chapitres, sections, annexes) et regroupe
+    les articles consécutifs en chunks d'au plus `token_budget` tokens estimés.
+    Un article plus long que le budget est redécoupé par paragraphes.
+    """
+    starts = [m.start() for m in _ARTICLE_RE.finditer(text_of_law)]
+    bounds = [0] + [s for s in starts if s > 0] + [len(text_of_law)]
+    units = [text_of_law[a:b].strip() for a, b in zip(bounds, bounds[1:])]
+
+    chunks = []
+    current = []
+    used = 0
+    for unit in units:
+        if not unit:
+            continue
+        tokens = estimate_tokens(unit)
+        if tokens > token_budget:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            chunks.extend(chunk_text(unit, token_budget)[0])
+            continue
+        if current and used + tokens > token_budget:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _parse_date(value: str):
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value.strip())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt)
+        except ValueError:
+            continue
+    match = re.search(r"\b(19|20)\d{2}\b", cleaned)
+    return datetime(int(match.group(0)), 12, 31) if match else None
+
+
+def _union(lists: list[list[str]]) -> list[str]:
+    seen = set()
+    merged = []
+    for items in lists:
+        for item in items:
+            key = re.sub(r"[\W_]+", " ", item).strip().casefold()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+def merge_laws(partials: list[Law]) -> Law:
+    """
+    Fusion locale des extractions partielles : union des pays, secteurs, types et mesures,
+    sévérité maximale, date d'application la plus tôt (et le plus court délai non nul),
+    durée d'application et probabilité de révision maximales.
+    """
+    dates = _union([p.date_of_application for p in partials])
+    parsed = [(d, _parse_date(d)) for d in dates]
+    parsed = [(d, dt) for d, dt in parsed if dt is not None]
+    if parsed:
+        dates = [min(parsed, key=lambda item: item[1])[0]]
+
+    return Law(
+        countrys=_union([p.countrys for p in partials]),
+        sectors_of_activity=_union([p.sectors_of_activity for p in partials]),
+        regulation_types=_union([p.regulation_types for p in partials]),
+        date_of_application=dates,
+        measures_imposed=_union([p.measures_imposed for p in partials]),
+        severity=max(p.severity for p in partials),
+        # 0 signifie le plus souvent "non mentionné dans ce chunk"
+        time_before_application=min((p.time_before_application for p in partials if p.time_before_application > 0), default=0),
+        time_of_application=max(p.time_of_application for p in partials),
+        revision_probability=max(p.revision_probability for p in partials),
+    )
+
+
 if __name__ == "__main__":
     BUCKET = "csv-file-store-ec51f700"
     KEY = "dzd-3lz7fcr1rwmmkw/5h6d6xccl72dn4/dev/data/directives/1.DIRECTIVE (UE) 20192161 DU PARLEMENT EUROPÉEN ET DU CONSEIL.html"
     file = s3.get_object(Bucket=BUCKET, Key=KEY)
-    law_info = getLawInformations(file["Body"])
+    law_info = getLawInformations(file["Body"], filename=KEY)
     print(law_info)
\ No newline at end of file
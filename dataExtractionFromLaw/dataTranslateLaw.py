@@ -1,6 +1,177 @@
 import boto3
 import html
+import os
+import re
+import sys
+import threading
+import time
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from languageDetection import MIN_CONFIDENCE, _sample, detect_language_local, strip_markup
+from translationMemory import TranslationMemory
+
+translate = boto3.client("translate")
+translation_memory = TranslationMemory()
+
+# Amazon Translate accepte 10 000 octets par requête : on garde une marge pour les marqueurs
+MAX_REQUEST_BYTES = 9000
+TRANSLATE_WORKERS = 4
+REQUESTS_PER_SECOND = 5
+
+# Marqueur numéroté placé devant chaque segment d'un lot, retrouvé après traduction
+_MARKER = "[[§{}]]"
+_MARKER_RE = re.compile(r"\s*\[\[\s*§\s*(\d+)\s*\]\]\s*")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;。！？；])\s*")
+
+
+class _RateLimiter:
+    """Espace les appels d'au moins 1 / rate secondes, entre tous les threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_rate_limiter = _RateLimiter(REQUESTS_PER_SECOND)
+
+
+def _byte_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _translate_text(text: str, source_lang: str, target_lang: str) -> str:
+    _rate_limiter.wait()
+    response = translate.translate_text(
+        Text=text,
+        SourceLanguageCode=source_lang,
+        TargetLanguageCode=target_lang,
+        Settings={"Formality": "FORMAL"},
+        TerminologyNames=[]
+    )
+    return html.unescape(response["TranslatedText"])
+
+
+def _split_long_segment(text: str, max_bytes: int = MAX_REQUEST_BYTES) -> list[str]:
+    """Découpe un segment trop long pour une requête, sur les fins de phrases si possible."""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        while _byte_len(sentence) > max_bytes:
+            if current:
+                pieces.append(current)
+                current = ""
+            cut = len(sentence.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore"))
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if current and _byte_len(current) + _byte_len(sentence) + 1 > max_bytes:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack_segments(segments: list[str], max_bytes: int = MAX_REQUEST_BYTES) -> list[list[int]]:
+    """
+    Regroupe les indices des segments en lots dont le texte balisé tient dans `max_bytes`.
+    Un segment plus gros que la limite forme son propre lot.
+    """
+    batches = []
+    current = []
+    used = 0
+    for i, segment in enumerate(segments):
+        size = _byte_len(segment) + len(_MARKER.format(i)) + 2
+        if current and used + size > max_bytes:
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_one(segment: str, source_lang: str, target_lang: str):
+    """Traduction d'un segment seul, ou None en cas d'erreur."""
+    try:
+        if _byte_len(segment) > MAX_REQUEST_BYTES:
+            return " ".join(_translate_text(p, source_lang, target_lang) for p in _split_long_segment(segment))
+        return _translate_text(segment, source_lang, target_lang)
+    except Exception as e:
+        print(f"⚠️ Erreur de traduction sur le texte : '{segment[:40]}...' → {e}")
+        return None
+
+
+def _translate_batch(segments: list[str], source_lang: str, target_lang: str) -> list[str]:
+    """
+    Traduit un lot en une seule requête : chaque segment est précédé de son marqueur.
+    Si les marqueurs ne sont pas tous retrouvés, le lot est retraduit segment par segment.
+    """
+    if len(segments) == 1:
+        return [_translate_one(segments[0], source_lang, target_lang)]
+
+    payload = "\n".join(f"{_MARKER.format(i)}\n{segment}" for i, segment in enumerate(segments))
+    try:
+        parts = _MARKER_RE.split(_translate_text(payload, source_lang, target_lang))
+        translated = {int(parts[k]): parts[k + 1].strip() for k in range(1, len(parts) - 1, 2)}
+        if sorted(translated) == list(range(len(segments))) and not parts[0].strip():
+            return [translated[i] for i in range(len(segments))]
+        print(f"⚠️ Marqueurs perdus dans un lot de {len(segments)} segments, traduction un par un")
+    except Exception as e:
+        print(f"⚠️ Erreur de traduction sur un lot de {len(segments)} segments → {e}")
+
+    return [_translate_one(segment, source_lang, target_lang) for segment in segments]
+
+
+def translate_segments(segments: list[str], source_lang: str = "auto", target_lang: str = "en",
+                       max_workers: int = TRANSLATE_WORKERS, memory=translation_memory) -> list[str]:
+    """
+    Traduit une liste de segments en lots de taille bornée envoyés en parallèle (sous limite
+    de débit). Les segments identiques ne sont traduits qu'une fois, et ceux déjà présents
+    dans la mémoire de traduction (`memory`, None pour la désactiver) ne le sont plus.
+    Un segment dont la traduction échoue est gardé tel quel.
+    """
+    unique = list(dict.fromkeys(segments))
+    translations = memory.get_many(unique, source_lang, target_lang) if memory is not None else {}
+    to_translate = [segment for segment in unique if segment not in translations]
+    batches = pack_segments(to_translate)
+
+    new_translations = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda batch: _translate_batch([to_translate[i] for i in batch], source_lang, target_lang),
+            batches,
+        )
+        for batch, translated in zip(batches, results):
+            for i, text in zip(batch, translated):
+                if text is not None:
+                    new_translations[to_translate[i]] = text
+
+    if memory is not None:
+        memory.put_many(new_translations, source_lang, target_lang)
+    translations.update(new_translations)
+
+    print(
+        f"🌐 {len(segments)} segments ({len(unique)} uniques, {len(unique) - len(to_translate)} "
+        f"depuis la mémoire de traduction) traduits en {len(batches)} requêtes"
+    )
+    return [translations.get(segment, segment) for segment in segments]
+
 
 def translate_html_file(html_content, source_lang="auto", target_lang="en", output_path=None):
     """
@@ -16,34 +187,20 @@ def translate_html_file(html_content, source_lang="auto", target_lang="en", outp
         str: le contenu HTML traduit.
     """
 
-    # === 1. Initialiser le client Amazon Translate ===
-    translate = boto3.client("translate")
-
-    # === 3. Extraire le texte tout en conservant la structure HTML ===
+    # === 1. Extraire le texte tout en conservant la structure HTML ===
     # BeautifulSoup permet d’identifier les zones textuelles à traduire
     soup = BeautifulSoup(html_content, "html.parser")
 
-    # === 4. Traduire uniquement les noeuds textuels ===
-    for element in soup.find_all(string=True):
-        text = element.strip()
-        if text:
-            try:
-                response = translate.translate_text(
-                    Text=text,
-                    SourceLanguageCode=source_lang,
-                    TargetLanguageCode=target_lang,
-                    Settings={"Formality": "FORMAL"},
-                    TerminologyNames=[]
-                )
-                translated_text = html.unescape(response["TranslatedText"])
-                element.replace_with(translated_text)
-            except Exception as e:
-                print(f"⚠️ Erreur de traduction sur le texte : '{text[:40]}...' → {e}")
-
-    # === 5. Obtenir le HTML traduit final ===
+    # === 2. Traduire les noeuds textuels par lots, puis les remettre à leur place ===
+    elements = [element for element in soup.find_all(string=True) if element.strip()]
+    translated = translate_segments([element.strip() for element in elements], source_lang, target_lang)
+    for element, translated_text in zip(elements, translated):
+        element.replace_with(translated_text)
+
+    # === 3. Obtenir le HTML traduit final ===
     translated_html = str(soup)
 
-    # === 6. Optionnel : sauvegarde dans un nouveau fichier ===
+    # === 4. Optionnel : sauvegarde dans un nouveau fichier ===
     if output_path:
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(translated_html)
@@ -51,21 +208,22 @@ def translate_html_file(html_content, source_lang="auto", target_lang="en", outp
 
     return translated_html
 
-def detect_language(text: str) -> str:
-    """
-    Detects the dominant language in a large text by analyzing only half of it.
-    (Amazon Comprehend has a 5 000-byte limit per request.)
-    """
-    comprehend = boto3.client("comprehend")
-    if not text:
-        return "auto"
+def translate_plain_text(text: str, source_lang="auto", target_lang="en") -> str:
+    """Traduit un texte brut ligne par ligne (une ligne = un segment), en lots."""
+    lines = text.split("\n")
+    indexes = [i for i, line in enumerate(lines) if line.strip()]
+    translated = translate_segments([lines[i].strip() for i in indexes], source_lang, target_lang)
+    for i, translated_line in zip(indexes, translated):
+        lines[i] = translated_line
+    return "\n".join(lines)
 
-    # Use half of the text to reduce payload size
-    half_index = len(text) // 2
-    sample_text = text[:half_index]
+
+def _detect_language_comprehend(text: str) -> str:
+    """Détection par Amazon Comprehend (limite de 5 000 octets par requête)."""
+    comprehend = boto3.client("comprehend")
 
     # Ensure we don’t exceed Comprehend’s max text size
-    sample_text = sample_text[:4900]
+    sample_text = text[:4900]
 
     try:
         response = comprehend.detect_dominant_language(Text=sample_text)
@@ -74,13 +232,33 @@ def detect_language(text: str) -> str:
             return "auto"
 
         dominant_lang = max(languages, key=lambda l: l["Score"])["LanguageCode"]
-        print(f"🌍 Detected language: {dominant_lang}")
+        print(f"🌍 Detected language (Comprehend): {dominant_lang}")
         return dominant_lang
     except Exception as e:
         print(f"⚠️ Error detecting language: {e}")
         return "auto"
 
 
+def detect_language(text: str, use_comprehend: bool = True) -> str:
+    """
+    Detects the dominant language of a text locally (Unicode scripts and function words),
+    on the visible text only. Amazon Comprehend is only called when the local detector
+    is not confident enough, and only if `use_comprehend` is True.
+    """
+    if not text:
+        return "auto"
+
+    visible_text = strip_markup(text)
+    lang, confidence = detect_language_local(visible_text)
+    if lang != "auto" and confidence >= MIN_CONFIDENCE:
+        print(f"🌍 Detected language: {lang} ({confidence:.0%})")
+        return lang
+
+    if use_comprehend:
+        return _detect_language_comprehend(_sample(visible_text))
+    return "auto"
+
+
 
 
 if __name__ == "__main__":
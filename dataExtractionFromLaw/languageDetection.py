@@ -0,0 +1,105 @@
+import html
+import re
+from collections import Counter
+
+# Écritures non latines : (début, fin) des plages Unicode → langue
+SCRIPT_RANGES = [
+    (0x3040, 0x30FF, "ja"),   # Hiragana, Katakana
+    (0xAC00, 0xD7AF, "ko"),   # Hangul
+    (0x4E00, 0x9FFF, "zh"),   # Idéogrammes CJK
+    (0x0400, 0x04FF, "ru"),   # Cyrillique
+    (0x0600, 0x06FF, "ar"),   # Arabe
+    (0x0370, 0x03FF, "el"),   # Grec
+    (0x0590, 0x05FF, "he"),   # Hébreu
+    (0x0E00, 0x0E7F, "th"),   # Thaï
+    (0x0900, 0x097F, "hi"),   # Devanagari
+]
+
+# Mots-outils les plus fréquents des langues à alphabet latin
+FUNCTION_WORDS = {
+    "en": "the of and to in is that for by with shall be this are on or as from which an not",
+    "fr": "le la les de des du et en un une est que qui dans pour par sur au aux ne pas sont ou",
+    "de": "der die das und den des dem ist nicht ein eine zu von mit für auf im sich werden oder",
+    "es": "el la los las de del y en que por con para una un es se al lo como su sus",
+    "it": "il lo la gli le di del della e in che per con un una è sono dei delle al non",
+    "pt": "o a os as de do da dos das e em que para com um uma é não no na se",
+    "nl": "de het een en van in is dat op te voor met zijn niet door aan worden bij of",
+    "pl": "i w na z do się nie że jest to o dla przez oraz lub od jak być może",
+    "sv": "och i att det som en på är av för med till den har de inte om ett",
+    "da": "og i at det som en på er af for med til den har de ikke om et skal",
+    "ro": "și în de la cu a al o un care pentru este din pe sau să nu fi",
+}
+FUNCTION_WORDS = {lang: set(words.split()) for lang, words in FUNCTION_WORDS.items()}
+
+SAMPLE_CHARS = 3000
+MIN_WORDS = 20
+MIN_SCRIPT_SHARE = 0.3
+MIN_CONFIDENCE = 0.3
+
+_MARKUP_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]+>", re.IGNORECASE | re.DOTALL)
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def strip_markup(text: str) -> str:
+    """Retire balises, scripts et commentaires d'un extrait HTML/XML."""
+    if "<" not in text:
+        return text
+    return html.unescape(_MARKUP_RE.sub(" ", text))
+
+
+def _sample(text: str, sample_chars: int = SAMPLE_CHARS) -> str:
+    """Trois fenêtres (début, milieu, fin) plutôt qu'un préfixe, souvent fait de titres."""
+    if len(text) <= sample_chars:
+        return text
+    window = sample_chars // 3
+    middle = len(text) // 2
+    return " ".join([text[:window], text[middle - window // 2:middle + window // 2], text[-window:]])
+
+
+def _script_language(text: str):
+    counts = Counter()
+    letters = 0
+    for char in text:
+        code = ord(char)
+        if code < 0x0370:
+            if char.isalpha():
+                letters += 1
+            continue
+        for start, end, lang in SCRIPT_RANGES:
+            if start <= code <= end:
+                counts[lang] += 1
+                letters += 1
+                break
+    if not counts or letters == 0:
+        return None, 0.0
+    # Le japonais mélange kana et idéogrammes
+    if counts["ja"] and counts["ja"] * 10 >= counts["zh"]:
+        counts["ja"] += counts.pop("zh", 0)
+    lang, count = counts.most_common(1)[0]
+    return lang, count / letters
+
+
+def detect_language_local(text: str, sample_chars: int = SAMPLE_CHARS) -> tuple[str, float]:
+    """
+    Langue dominante d'un texte, sans appel réseau : écriture Unicode pour les langues
+    non latines, puis fréquence des mots-outils pour les langues à alphabet latin.
+
+    Returns:
+        (code langue, confiance entre 0 et 1), ou ("auto", 0.0) si le texte ne suffit pas.
+    """
+    sample = _sample(strip_markup(text), sample_chars)
+
+    lang, share = _script_language(sample)
+    if lang is not None and share >= MIN_SCRIPT_SHARE:
+        return lang, share
+
+    words = [w.lower() for w in _WORD_RE.findall(sample)]
+    if len(words) < MIN_WORDS:
+        return "auto", 0.0
+
+    scores = {lang: sum(1 for w in words if w in vocabulary) for lang, vocabulary in FUNCTION_WORDS.items()}
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    best, second = scores[ranked[0]], scores[ranked[1]]
+    if best == 0:
+        return "auto", 0.0
+    return ranked[0], (best - second) / best
@@ -0,0 +1,244 @@
+import codecs
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from dataExtractionFrom10K.sectionExtractionFrom10K import (
+    CHUNK_SIZE, _FilingEvents, _TextNormalizer, _VisibleTextHandler, feed_html,
+)
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+SUPPORTED_FORMATS = ("html", "xhtml", "xml", "pdf", "docx", "json", "csv", "txt")
+
+# Au-delà, les fichiers non lisibles en flux (pdf, docx) passent par un fichier temporaire
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    Enveloppe un flux binaire (upload Streamlit, body S3) : compte les octets lus et
+    permet de regarder les premiers octets sans les consommer (détection du format).
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self.buffer = b""
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _read_stream(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        return data.encode("utf-8") if isinstance(data, str) else data or b""
+
+    def peek(self, size: int) -> bytes:
+        if len(self.buffer) < size:
+            self.buffer += self._read_stream(size - len(self.buffer))
+        return self.buffer[:size]
+
+    def readinto(self, b) -> int:
+        size = len(b)
+        data = self.buffer if self.buffer else self._read_stream(size)
+        data, self.buffer = data[:size], data[size:]
+        b[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+class _TextSink:
+    def __init__(self):
+        self.pieces = []
+
+    def write(self, text: str):
+        self.pieces.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.pieces)
+
+
+class _XmlTextHandler(_VisibleTextHandler):
+    """Texte d'un document XML (Formex, Akoma Ntoso, ...) : chaque élément est un bloc."""
+
+    def on_start(self, tag, attrib):
+        if tag in self.skipped_tags:
+            self.skip_depth += 1
+        self.normalizer.separator(True)
+
+    def on_end(self, tag):
+        if tag in self.skipped_tags and self.skip_depth > 0:
+            self.skip_depth -= 1
+        self.normalizer.separator(True)
+
+
+class _DocxTextHandler(_FilingEvents):
+    """Texte de word/document.xml : seuls les <w:t> comptent, un paragraphe par <w:p>."""
+
+    def __init__(self, normalizer: _TextNormalizer):
+        super().__init__()
+        self.normalizer = normalizer
+        self.in_text = False
+
+    def on_start(self, tag, attrib):
+        if tag in ("w:p", "w:br"):
+            self.normalizer.separator(True)
+        elif tag == "w:tab":
+            self.normalizer.separator()
+        elif tag == "w:t":
+            self.in_text = True
+
+    def on_end(self, tag):
+        if tag == "w:t":
+            self.in_text = False
+        elif tag == "w:p":
+            self.normalizer.separator(True)
+
+    def on_text(self, text):
+        if self.in_text:
+            self.normalizer.write(text)
+
+
+def detect_format(reader: _CountingReader, filename: str = None) -> str:
+    """Format du document : extension du nom de fichier, sinon premiers octets."""
+    if filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip(".")
+        if extension in ("htm", "html"):
+            return "html"
+        if extension in SUPPORTED_FORMATS or extension == "doc":
+            return extension
+
+    head = reader.peek(512).lstrip()
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    if head[:1] in (b"{", b"["):
+        return "json"
+    if head.startswith(b"<?xml") and b"<html" not in head.lower():
+        return "xml"
+    if head.startswith(b"<"):
+        return "html"
+    return "txt"
+
+
+def _spool(reader: _CountingReader):
+    """Copie le flux dans un fichier temporaire (en mémoire sous SPOOL_MAX_BYTES) pour pdf/docx."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    shutil.copyfileobj(reader, spooled, CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def _iter_markup(reader, handler_factory):
+    sink = _TextSink()
+    feed_html(reader, handler_factory(_TextNormalizer(sink)))
+    yield sink.getvalue()
+
+
+def _iter_pdf(reader):
+    if PdfReader is None:
+        raise ImportError("pypdf est nécessaire pour lire les lois au format PDF (pip install pypdf)")
+    with _spool(reader) as spooled:
+        for page in PdfReader(spooled).pages:
+            yield (page.extract_text() or "").strip() + "\n"
+
+
+def _iter_docx(reader):
+    with _spool(reader) as spooled, zipfile.ZipFile(spooled) as archive:
+        with archive.open("word/document.xml") as document:
+            yield from _iter_markup(document, _DocxTextHandler)
+
+
+def _iter_text(reader):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _iter_csv(reader):
+    text = io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8", errors="replace", newline="")
+    for row in csv.reader(text):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if cells:
+            yield " | ".join(cells) + "\n"
+
+
+def _flatten_json(value, path=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten_json(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten_json(item, path)
+    elif isinstance(value, str) and value.strip():
+        yield f"{path}: {value.strip()}\n" if path else value.strip() + "\n"
+    elif value is not None and not isinstance(value, str):
+        yield f"{path}: {value}\n"
+
+
+def _iter_json(reader):
+    payload = json.load(io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8", errors="replace"))
+    yield from _flatten_json(payload)
+
+
+def iter_law_text(reader: _CountingReader, fmt: str):
+    """Texte propre du document, morceau par morceau, selon son format."""
+    if fmt in ("html", "xhtml"):
+        yield from _iter_markup(reader, lambda n: _VisibleTextHandler(n, skipped_tags={"script", "style"}))
+    elif fmt == "xml":
+        yield from _iter_markup(reader, lambda n: _XmlTextHandler(n, skipped_tags={"script", "style"}))
+    elif fmt == "pdf":
+        yield from _iter_pdf(reader)
+    elif fmt == "docx":
+        yield from _iter_docx(reader)
+    elif fmt == "json":
+        yield from _iter_json(reader)
+    elif fmt == "csv":
+        yield from _iter_csv(reader)
+    elif fmt == "txt":
+        yield from _iter_text(reader)
+    else:
+        raise ValueError(f"Format de loi non supporté : .{fmt} (formats acceptés : {', '.join(SUPPORTED_FORMATS)})")
+
+
+def ingest_law(file, filename: str = None) -> str:
+    """
+    Convertit une loi (upload Streamlit, body S3, fichier ouvert, str ou bytes) en texte
+    propre, sans balises, en lisant le document en flux.
+
+    Args:
+        file: le document source.
+        filename: nom du fichier, pour en déduire le format (par défaut `file.name`).
+
+    Returns:
+        str: le texte de la loi, un bloc par ligne.
+    """
+    if isinstance(file, str):
+        file = file.encode("utf-8")
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    filename = filename or getattr(file, "name", None)
+
+    reader = _CountingReader(file)
+    fmt = detect_format(reader, filename)
+    text = "".join(iter_law_text(reader, fmt)).strip()
+
+    if reader.bytes_read:
+        print(
+            f"📄 Loi ({fmt}) : {reader.bytes_read} octets bruts → {len(text.encode('utf-8'))} octets de texte "
+            f"({max(0, 1 - len(text.encode('utf-8')) / reader.bytes_read):.0%} de balisage retiré)"
+        )
+    return text
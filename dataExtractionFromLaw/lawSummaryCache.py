@@ -0,0 +1,141 @@
+import boto3
+import hashlib
+import json
+import os
+import tempfile
+
+from dataExtractionFromLaw.translationMemory import normalize_segment
+
+LAW_CACHE_DIR = os.environ.get("LAW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "lawSummaries"))
+# Si défini, le cache est partagé sur S3 (ou tout stockage compatible via LAW_CACHE_S3_ENDPOINT)
+LAW_CACHE_S3_BUCKET = os.environ.get("LAW_CACHE_S3_BUCKET")
+LAW_CACHE_S3_PREFIX = os.environ.get("LAW_CACHE_S3_PREFIX", "lawSummaries")
+LAW_CACHE_S3_ENDPOINT = os.environ.get("LAW_CACHE_S3_ENDPOINT")
+
+
+def law_text_sha256(text: str) -> str:
+    return hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()
+
+
+class DiskCacheBackend:
+    """Un fichier JSON par entrée : <directory>/<namespace>/<sha256>.json"""
+
+    def __init__(self, directory: str = LAW_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, value: dict):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix: str) -> int:
+        directory = os.path.join(self.directory, prefix)
+        if not os.path.isdir(directory):
+            return 0
+        removed = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                os.remove(os.path.join(root, name))
+                removed += 1
+        return removed
+
+
+class S3CacheBackend:
+    """Objets JSON sous s3://<bucket>/<prefix>/<namespace>/<sha256>.json (S3 ou compatible)."""
+
+    def __init__(self, bucket: str, prefix: str = LAW_CACHE_S3_PREFIX, endpoint_url: str = None, client=None):
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.s3 = client or boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json"
+
+    def get(self, key: str):
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(obj["Body"].read().decode("utf-8"))
+
+    def put(self, key: str, value: dict):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=json.dumps(value).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+    def delete(self, key: str):
+        self.s3.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        removed = 0
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/{prefix}/"):
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": objects})
+                removed += len(objects)
+        return removed
+
+
+class LawSummaryCache:
+    """
+    Cache des résumés de lois, adressé par le contenu : SHA-256 du texte normalisé, rangé
+    sous un espace de noms "<modèle>/v<version du prompt>". Changer de modèle ou de prompt
+    n'utilise donc jamais un ancien résumé ; invalidate_version() fait le ménage.
+    """
+
+    def __init__(self, backend, model_id: str, prompt_version: int):
+        self.backend = backend
+        self.model_id = model_id
+        self.prompt_version = prompt_version
+
+    def namespace(self, model_id: str = None, prompt_version: int = None) -> str:
+        model_id = (model_id or self.model_id).replace(":", "_").replace("/", "_")
+        return f"{model_id}/v{prompt_version if prompt_version is not None else self.prompt_version}"
+
+    def key(self, text: str) -> str:
+        return f"{self.namespace()}/{law_text_sha256(text)}"
+
+    def get(self, text: str):
+        return self.backend.get(self.key(text))
+
+    def put(self, text: str, summary: dict):
+        self.backend.put(self.key(text), summary)
+
+    def invalidate(self, text: str):
+        """Supprime le résumé d'une loi (pour la version courante du prompt)."""
+        self.backend.delete(self.key(text))
+
+    def invalidate_version(self, model_id: str = None, prompt_version: int = None) -> int:
+        """Supprime tous les résumés d'une version de prompt (par défaut la courante)."""
+        removed = self.backend.delete_prefix(self.namespace(model_id, prompt_version))
+        print(f"🧹 {removed} résumés de lois supprimés du cache ({self.namespace(model_id, prompt_version)})")
+        return removed
+
+
+def default_backend():
+    if LAW_CACHE_S3_BUCKET:
+        return S3CacheBackend(LAW_CACHE_S3_BUCKET, LAW_CACHE_S3_PREFIX, LAW_CACHE_S3_ENDPOINT)
+    return DiskCacheBackend(LAW_CACHE_DIR)
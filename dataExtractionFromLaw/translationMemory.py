@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sqliteCache.sqliteCache import SqliteLRUCache
+
+TRANSLATION_MEMORY_PATH = os.environ.get(
+    "TRANSLATION_MEMORY_PATH", os.path.join(tempfile.gettempdir(), "translationMemory.sqlite")
+)
+# Nombre maximal de segments gardés sur disque, puis en mémoire vive
+MAX_ENTRIES = 500_000
+MEMORY_ENTRIES = 20_000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_segment(text: str) -> str:
+    """Forme canonique d'un segment : Unicode NFKC et espaces réduits à un seul."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def segment_key(source_lang: str, target_lang: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()
+    return f"{source_lang}:{target_lang}:{digest}"
+
+
+class TranslationMemory:
+    """
+    Mémoire de traduction persistante : (langue source, langue cible, hash du segment
+    normalisé) → traduction. SQLite sur disque, avec un cache LRU en mémoire devant.
+    Au-delà de `max_entries`, les segments les moins récemment utilisés sont supprimés.
+    """
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH, max_entries: int = MAX_ENTRIES,
+                 memory_entries: int = MEMORY_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.lock = threading.Lock()
+        self.lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.store = SqliteLRUCache(path, "translations", {"translation": "TEXT NOT NULL"}, max_entries)
+
+    def _remember(self, key: str, translation: str):
+        self.lru[key] = translation
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.memory_entries:
+            self.lru.popitem(last=False)
+
+    def get_many(self, segments: list[str], source_lang: str, target_lang: str) -> dict:
+        """Traductions connues des segments demandés : {segment: traduction}."""
+        keys = {segment: segment_key(source_lang, target_lang, segment) for segment in segments}
+        found = {}
+        with self.lock:
+            missing = []
+            for segment, key in keys.items():
+                if key in self.lru:
+                    self.lru.move_to_end(key)
+                    found[segment] = self.lru[key]
+                else:
+                    missing.append(segment)
+            # Un segment servi par le cache mémoire reste récent sur disque
+            self.store.touch([keys[segment] for segment in found])
+
+            rows = self.store.get_many([keys[segment] for segment in missing])
+            for segment in missing:
+                if keys[segment] in rows:
+                    found[segment] = rows[keys[segment]][0]
+                    self._remember(keys[segment], found[segment])
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, translations: dict, source_lang: str, target_lang: str):
+        """Enregistre {segment: traduction} puis applique la limite de taille (LRU)."""
+        if not translations:
+            return
+        rows = {segment_key(source_lang, target_lang, s): (t,) for s, t in translations.items()}
+        self.store.put_many(rows)
+        with self.lock:
+            for key, (translation,) in rows.items():
+                self._remember(key, translation)
+
+    def clear(self):
+        self.store.clear()
+        with self.lock:
+            self.lru.clear()
+
+    def __len__(self):
+        return len(self.store)
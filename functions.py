@@ -3,7 +3,8 @@ import matplotlib.pyplot as plt
 from PIL import Image
 import numpy as np
 import io
-from concernedEntreprises.concernedEntreprises import getConcernedEntreprises
+from concernedEntreprises.concernedEntreprises import getConcernedEntreprises, iterConcernedEntreprises, rankConcernedEntreprises
+from concernedEntreprises.rankedScores import RankedScores
 from dataExtractionFromLaw.dataExtractionFromLaw import getLawInformations
 from createSpiderCharts.createSpiderCharts import SpiderChart
 
@@ -51,6 +52,37 @@ class Functions:
         self.top_10_entreprises, self.entreprises = getConcernedEntreprises(LAW_SUM, self.ENTREPRISES_KEY, investment_horizon)
         return self.top_10_entreprises
 
+    def iterTop10(self, LAW_SUM, investment_horizon):
+        """
+        Same as getTop10, but yields the current top 10 ({name: result}) every time it
+        changes while scoring is still running. At the end, self.top_10_entreprises and
+        self.entreprises are filled exactly like getTop10 does.
+        """
+        results = {}
+        last_top = None
+        for ticker, result, top in iterConcernedEntreprises(LAW_SUM, self.ENTREPRISES_KEY, investment_horizon):
+            results[ticker] = result
+            if [name for name, _ in top] != last_top:
+                last_top = [name for name, _ in top]
+                yield dict(top)
+
+        if not results:
+            self.entreprises = RankedScores.empty()
+            self.top_10_entreprises = self.entreprises
+            return
+        self.entreprises = rankConcernedEntreprises(results, LAW_SUM)
+        self.top_10_entreprises = self.entreprises.top(100)
+        yield self.entreprises.top(10).to_dict()
+
+    def rerankTop10(self, investment_horizon):
+        """
+        Re-rank the already scored companies for another investment horizon, without
+        calling the model again (only the temporal impact is recomputed, vectorized).
+        """
+        self.entreprises = self.entreprises.rerank(investment_horizon)
+        self.top_10_entreprises = self.entreprises.top(100)
+        return self.top_10_entreprises
+
     def getSpiderCharts(self, tickers, LAW_SUM):
         for ticker in tickers:
             self.spiderCharts[ticker] = SpiderChart(ticker, LAW_SUM).drawHexagonRadar()
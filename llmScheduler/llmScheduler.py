@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from pydantic import BaseModel
+
+
+class ModelQuota(BaseModel):
+    requests_per_minute: int
+    tokens_per_minute: int
+    max_concurrency: int
+
+
+# Quotas Bedrock à la demande du compte, par modèle (à ajuster si le compte obtient une hausse)
+MODEL_QUOTAS = {
+    "anthropic.claude-3-sonnet-20240229-v1:0": ModelQuota(
+        requests_per_minute=500, tokens_per_minute=1_000_000, max_concurrency=32,
+    ),
+    "global.anthropic.claude-haiku-4-5-20251001-v1:0": ModelQuota(
+        requests_per_minute=1000, tokens_per_minute=2_000_000, max_concurrency=64,
+    ),
+}
+DEFAULT_QUOTA = ModelQuota(requests_per_minute=200, tokens_per_minute=400_000, max_concurrency=16)
+
+# Facteur global pour rester sous les quotas partagés avec d'autres jobs du compte
+QUOTA_FRACTION = float(os.environ.get("LLM_QUOTA_FRACTION", "0.9"))
+MAX_RETRIES = 6
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+THROTTLING_CODES = {
+    "ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+    "ModelNotReadyException", "ServiceQuotaExceededException",
+}
+
+
+def is_throttling(exc: BaseException) -> bool:
+    """Vrai si l'erreur (ou une erreur qu'elle enveloppe, ex. instructor) est un refus pour quota."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        response = getattr(exc, "response", None)
+        code = response.get("Error", {}).get("Code") if isinstance(response, dict) else None
+        if code in THROTTLING_CODES or type(exc).__name__ in THROTTLING_CODES:
+            return True
+        if any(name in str(exc) for name in THROTTLING_CODES):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def estimate_request_tokens(kwargs: dict) -> int:
+    """
+    Tokens décomptés par Bedrock pour une requête : entrée (~4 caractères par token)
+    plus maxTokens, réservé d'avance sur le quota de tokens par minute.
+    """
+    chars = sum(len(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+    return chars // 4 + kwargs.get("inferenceConfig", {}).get("maxTokens", 0)
+
+
+class _TokenBucket:
+    """Seau à jetons partagé entre threads : `rate` jetons par seconde, au plus `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        # Une requête plus grosse que le seau passe quand il est plein, sans bloquer à jamais
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class _AimdLimiter:
+    """
+    Limite de concurrence adaptative (AIMD) : +1 requête simultanée par « fenêtre » réussie,
+    divisée par deux à chaque refus pour quota.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max(1, max_concurrency // 4))
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class _ModelLane:
+    """Débit (requêtes et tokens par seconde) et concurrence d'un modèle."""
+
+    def __init__(self, quota: ModelQuota):
+        requests_per_second = quota.requests_per_minute * QUOTA_FRACTION / 60
+        tokens_per_second = quota.tokens_per_minute * QUOTA_FRACTION / 60
+        self.requests = _TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.tokens = _TokenBucket(tokens_per_second, tokens_per_second * 10)
+        self.concurrency = _AimdLimiter(quota.max_concurrency)
+        self.throttled = 0
+        self.calls = 0
+
+
+class LLMScheduler:
+    """
+    Ordonnanceur partagé des appels Bedrock, utilisé depuis n'importe quel thread.
+    Chaque appel attend son tour dans le seau de requêtes et de tokens de son modèle,
+    puis une place dans la limite de concurrence AIMD. Un refus pour quota réduit la
+    concurrence et relance l'appel après un délai exponentiel avec gigue.
+    """
+
+    def __init__(self, quotas: dict = None, default_quota: ModelQuota = DEFAULT_QUOTA):
+        self.quotas = quotas if quotas is not None else MODEL_QUOTAS
+        self.default_quota = default_quota
+        self.lanes = {}
+        self.lock = threading.Lock()
+
+    def lane(self, model_id: str) -> _ModelLane:
+        with self.lock:
+            if model_id not in self.lanes:
+                self.lanes[model_id] = _ModelLane(self.quotas.get(model_id, self.default_quota))
+            return self.lanes[model_id]
+
+    def call(self, model_id: str, fn, *args, estimated_tokens: int = 0, **kwargs):
+        """Exécute `fn(*args, **kwargs)` dans les quotas de `model_id`, avec relances."""
+        lane = self.lane(model_id)
+        for attempt in range(MAX_RETRIES + 1):
+            lane.requests.acquire()
+            if estimated_tokens:
+                lane.tokens.acquire(estimated_tokens)
+            lane.concurrency.acquire()
+            throttled = False
+            try:
+                lane.calls += 1
+                return fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttling(e)
+                if not throttled or attempt == MAX_RETRIES:
+                    raise
+                lane.throttled += 1
+            finally:
+                lane.concurrency.release(throttled)
+
+            # Full jitter : délai aléatoire entre 0 et base * 2^tentative
+            delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+            print(f"⏳ {model_id} limité (tentative {attempt + 1}/{MAX_RETRIES}), "
+                  f"concurrence → {int(lane.concurrency.limit)}, nouvel essai dans {delay:.1f}s")
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                model_id: {"calls": lane.calls, "throttled": lane.throttled,
+                           "concurrency": int(lane.concurrency.limit)}
+                for model_id, lane in self.lanes.items()
+            }
+
+
+scheduler = LLMScheduler()
+
+
+class _ScheduledCompletions:
+    def __init__(self, completions, scheduler: LLMScheduler):
+        self.completions = completions
+        self.scheduler = scheduler
+
+    def create(self, **kwargs):
+        return self.scheduler.call(
+            kwargs.get("modelId", ""), self.completions.create,
+            estimated_tokens=estimate_request_tokens(kwargs), **kwargs,
+        )
+
+
+class _ScheduledChat:
+    def __init__(self, chat, scheduler: LLMScheduler):
+        self.completions = _ScheduledCompletions(chat.completions, scheduler)
+
+
+class ScheduledClient:
+    """
+    Enveloppe d'un client instructor : `client.chat.completions.create(...)` passe par
+    l'ordonnanceur partagé, sans rien changer aux appels existants.
+    """
+
+    def __init__(self, client, scheduler: LLMScheduler = scheduler):
+        self.client = client
+        self.chat = _ScheduledChat(client.chat, scheduler)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Une passe d'éviction au plus toutes les EVICT_EVERY écritures, sauf si la table dépasse sa taille
+EVICT_EVERY = 10_000
+# Une éviction redescend à LOW_WATER × max_entries, pour ne pas repasser à chaque écriture suivante
+LOW_WATER = 0.9
+
+
+class SqliteLRUCache:
+    """
+    Table SQLite clé → valeurs, bornée en taille : au-delà de `max_entries`, les lignes les
+    moins récemment utilisées (`last_used`) sont supprimées. Avec `ttl_seconds`, chaque ligne
+    garde aussi sa date d'écriture (`created`) : passé ce délai, elle est ignorée puis supprimée.
+
+    Le nombre de lignes est compté une fois à l'ouverture puis tenu en mémoire : une écriture
+    ne coûte pas de COUNT(*). L'éviction ne tourne que quand ce compteur dépasse la limite,
+    ou toutes les `evict_every` écritures (autres processus sur le même fichier).
+    """
+
+    def __init__(self, path: str, table: str, columns: dict[str, str], max_entries: int,
+                 ttl_seconds: int | None = None, evict_every: int = EVICT_EVERY):
+        self.path = path
+        self.table = table
+        self.columns = list(columns)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        schema = ", ".join(f"{name} {kind}" for name, kind in columns.items())
+        if ttl_seconds is not None:
+            schema += ", created REAL NOT NULL"
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, {schema}, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used)")
+        self.connection.commit()
+
+        # Majorant du nombre de lignes : une écriture qui remplace une clé existante compte aussi
+        self.row_count = self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self.writes_since_evict = 0
+
+    def get_many(self, keys: list[str]) -> dict[str, tuple]:
+        """Lignes connues des clés demandées : {clé: (valeurs dans l'ordre des colonnes)}."""
+        now = time.time()
+        found = {}
+        selected = ", ".join(self.columns)
+        fresh, fresh_params = "", []
+        if self.ttl_seconds is not None:
+            fresh, fresh_params = " AND created >= ?", [now - self.ttl_seconds]
+        with self.lock:
+            # SQLite limite le nombre de paramètres par requête
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, {selected} FROM {self.table} WHERE key IN ({placeholders}){fresh}",
+                    chunk + fresh_params,
+                ).fetchall()
+                found.update({row[0]: tuple(row[1:]) for row in rows})
+
+            self.connection.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+            )
+            self.connection.commit()
+        return found
+
+    def touch(self, keys: list[str]):
+        """Marque des clés comme utilisées (lues depuis un cache placé devant la table)."""
+        if not keys:
+            return
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key in keys]
+            )
+            self.connection.commit()
+
+    def put_many(self, rows: dict[str, tuple]):
+        """Enregistre {clé: (valeurs dans l'ordre des colonnes)} ; évince si nécessaire."""
+        if not rows:
+            return
+        now = time.time()
+        stamps = ["last_used"] if self.ttl_seconds is None else ["created", "last_used"]
+        names = ", ".join(["key", *self.columns, *stamps])
+        placeholders = ",".join("?" * (1 + len(self.columns) + len(stamps)))
+        with self.lock:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} ({names}) VALUES ({placeholders})",
+                [(key, *values, *[now] * len(stamps)) for key, values in rows.items()],
+            )
+            self.row_count += len(rows)
+            self.writes_since_evict += len(rows)
+            if self.row_count > self.max_entries or self.writes_since_evict >= self.evict_every:
+                self._evict(now)
+            self.connection.commit()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds is not None:
+            self.connection.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl_seconds,))
+        count = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count > self.max_entries:
+            target = int(self.max_entries * LOW_WATER)
+            self.connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                (count - target,),
+            )
+            count = target
+        self.row_count = count
+        self.writes_since_evict = 0
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute(f"DELETE FROM {self.table}")
+            self.connection.commit()
+            self.row_count = 0
+            self.writes_since_evict = 0
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from concernedEntreprises.companyStore import CompanyProfileStore
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body.read()
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": f'"{hash(self.objects[Key])}"'}
+
+    def download_file(self, Bucket, Key, Filename):
+        with open(Filename, "wb") as f:
+            f.write(self.objects[Key])
+
+
+def test_load_reads_etags_and_builds_profiles_on_demand(tmp_path):
+    store = CompanyProfileStore(FakeS3(), "bucket", "prefix", directory=str(tmp_path))
+    profiles = {
+        "AAPL": {"business_resume": "Phones", "sector": ["Technology"], "t_conformite": 2},
+        "XOM": {"business_resume": "Oil", "country_of_operation": ["United States"]},
+    }
+    store.compact(profiles, {"AAPL": '"a"', "XOM": '"x"'})
+
+    stored = store.load()
+    assert stored.etags == {"AAPL": '"a"', "XOM": '"x"'}
+    assert "AAPL" in stored and len(stored) == 2
+    assert stored.profile("XOM") == profiles["XOM"]
+    assert stored.profile("AAPL") == profiles["AAPL"]
+
+
+def test_load_without_compacted_file(tmp_path):
+    stored = CompanyProfileStore(FakeS3(), "bucket", "prefix", directory=str(tmp_path)).load()
+    assert len(stored) == 0 and stored.etag("AAPL") is None
+
+
+def test_update_only_reloads_changed_summaries(tmp_path):
+    store = CompanyProfileStore(FakeS3(), "bucket", "state", directory=str(tmp_path))
+    summaries = {"AAPL": {"business_resume": "Phones"}, "XOM": {"business_resume": "Oil"}}
+    loaded = []
+
+    def load_summary(key):
+        loaded.append(key)
+        return summaries[key]
+
+    entries = {"AAPL": ("AAPL", '"1"'), "XOM": ("XOM", '"1"')}
+    assert store.update(entries, load_summary) is True
+    assert sorted(loaded) == ["AAPL", "XOM"]
+    assert store.key == "state/_profiles.arrow"
+
+    loaded.clear()
+    assert store.update(entries, load_summary) is False
+    assert loaded == []
+
+    summaries["XOM"] = {"business_resume": "Energy"}
+    del entries["AAPL"]
+    entries["XOM"] = ("XOM", '"2"')
+    assert store.update(entries, load_summary) is True
+    assert loaded == ["XOM"]
+    stored = store.load()
+    assert stored.etags == {"XOM": '"2"'} and stored.profile("XOM") == summaries["XOM"]
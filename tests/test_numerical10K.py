@@ -0,0 +1,56 @@
+import pytest
+
+from dataExtractionFrom10K.xbrlFactsFrom10K import extract_numerical_from_xbrl
+
+CURRENT = ("2023-10-01", "2024-09-28")
+PREVIOUS = ("2022-09-25", "2023-09-30")
+
+
+def duration(concept, value, period=CURRENT, unit="iso4217:USD"):
+    return {"concept": f"us-gaap:{concept}", "start": period[0], "end": period[1], "unit": unit, "value": value}
+
+
+def instant(concept, value, end=CURRENT[1]):
+    return {"concept": f"us-gaap:{concept}", "start": None, "end": end, "unit": "iso4217:USD", "value": value}
+
+
+FULL_FACTS = [
+    duration("Revenues", 391_035e6), duration("Revenues", 383_285e6, PREVIOUS),
+    duration("NetIncomeLoss", 93_736e6),
+    duration("OperatingIncomeLoss", 123_216e6),
+    duration("CostOfGoodsAndServicesSold", 210_352e6),
+    duration("EarningsPerShareDiluted", 6.08, unit="iso4217:USD/shares"),
+    duration("EarningsPerShareDiluted", 6.13, PREVIOUS, unit="iso4217:USD/shares"),
+    duration("WeightedAverageNumberOfDilutedSharesOutstanding", 15_408_095e3, unit="shares"),
+    duration("IncomeTaxExpenseBenefit", 29_749e6),
+    duration("IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest", 123_485e6),
+    duration("InterestExpense", -3_933e6),
+    instant("Assets", 364_980e6), instant("AssetsCurrent", 152_987e6), instant("LiabilitiesCurrent", 176_392e6),
+    instant("StockholdersEquity", 56_950e6),
+    instant("InventoryNet", 7_286e6), instant("InventoryNet", 6_331e6, PREVIOUS[1]),
+    instant("LongTermDebt", 96_662e6), instant("CommercialPaper", 9_967e6),
+]
+
+
+def test_cost_of_debt_from_interest_expense():
+    values = extract_numerical_from_xbrl(FULL_FACTS)
+    assert values["total_debt"] == 96_662e6 + 9_967e6
+    assert values["cost_of_debt"] == pytest.approx(3_933e6 / (96_662e6 + 9_967e6))
+
+
+def test_full_xbrl_filing_needs_no_llm(monkeypatch):
+    pytest.importorskip("boto3")
+    pytest.importorskip("instructor")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    from dataExtractionFrom10K import dataExtractionNumerical10K as numerical
+    from dataExtractionFrom10K.parsedFiling import ParsedFiling
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("le modèle ne doit pas être appelé")
+
+    monkeypatch.setattr(numerical, "getNumericalFrom10K", no_llm)
+    monkeypatch.setattr(numerical, "extract_structured_tables", lambda filing: [])
+
+    result = numerical.getNumerical10K(ParsedFiling("", [], [], FULL_FACTS))
+    assert set(result.provenance.values()) == {"xbrl"}
+    assert result.values.cost_of_debt == pytest.approx(3_933e6 / (96_662e6 + 9_967e6))
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from concernedEntreprises.preFilter import LawPreFilter, resolve_countries, resolve_sectors
+
+COMPANY = {"country_of_operation": ["Japan"], "country_headquarters": ["Japan"], "sector": ["Retail"]}
+
+
+def make_law(countrys, sectors_of_activity):
+    return SimpleNamespace(countrys=countrys, sectors_of_activity=sectors_of_activity)
+
+
+def test_eu_variants_expand_to_member_states():
+    for term in ["All EU Member States", "European Union (EU)", "EU-27", "European Economic Area"]:
+        countries, unknown = resolve_countries([term])
+        assert "france" in countries and not unknown, term
+
+
+def test_parenthesised_aliases():
+    assert resolve_countries(["China (PRC)"])[0] == {"china"}
+    assert resolve_countries(["United States of America (USA)"])[0] == {"united states"}
+
+
+def test_scope_terms_are_not_sectors():
+    for term in ["Large undertakings", "Listed companies", "Public-interest entities",
+                 "Companies with more than 250 employees"]:
+        families, _, unknown = resolve_sectors([term])
+        assert not families and unknown == [term]
+
+
+def test_unrecognised_scope_excludes_nobody():
+    law = make_law(["Atlantis"], ["Large undertakings", "Companies with more than 250 employees"])
+    assert LawPreFilter(law).check(COMPANY) == (True, "")
+
+
+def test_recognised_scope_still_filters():
+    law = make_law(["EU-27"], ["Banking"])
+    assert LawPreFilter(law).check(COMPANY)[0] is False
+    assert LawPreFilter(law).check({"country_of_operation": ["France"], "sector": ["Banks"]})[0] is True
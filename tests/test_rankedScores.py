@@ -0,0 +1,30 @@
+from concernedEntreprises.rankedScores import RankedScores
+
+RESULTS = {
+    "AAPL": {"score": 4, "t_conformite": 2, "impact_temporiel": 0.5, "score_final": 2.0},
+    "XOM": {"score": 0, "t_conformite": 1, "impact_temporiel": 0.4, "score_final": 0.0,
+            "reasoning": "Pré-filtre", "prefiltered": True},
+    "MSFT": {"score": 2, "t_conformite": 1, "impact_temporiel": 0.5, "score_final": 1.0},
+    "KO": {"reasoning": "Hors présélection", "shortlisted": False},
+}
+
+
+def test_unscored_companies_are_kept_out_of_the_ranking():
+    ranked = RankedScores.from_results(RESULTS, 6, 0.2)
+    assert ranked.keys() == ["AAPL", "MSFT", "XOM"]
+    assert ranked.top(2).keys() == ["AAPL", "MSFT"]
+    assert ranked.top(10).keys() == ["AAPL", "MSFT", "XOM"]
+    assert ranked.unscored() == ["KO"]
+    assert ranked["KO"] == {"reasoning": "Hors présélection", "shortlisted": False}
+
+
+def test_rerank_keeps_unscored_companies_apart():
+    ranked = RankedScores.from_results(RESULTS, 6, 0.2).rerank("Long terme")
+    assert "KO" not in ranked.keys()
+    assert ranked.unscored() == ["KO"]
+
+
+def test_empty_ranking():
+    ranked = RankedScores.empty()
+    assert len(ranked) == 0 and ranked.top(10).to_dict() == {} and ranked.unscored() == []
+    assert ranked.rerank("Moyen terme").keys() == []
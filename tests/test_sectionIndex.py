@@ -0,0 +1,37 @@
+import random
+import time
+
+from dataExtractionFrom10K.sectionIndexFrom10K import ITEM_ORDER, _drop_table_of_contents, _longest_item_chain
+
+
+def test_chain_keeps_earliest_heading_of_each_item():
+    candidates = [(0, "1"), (10, "1A"), (20, "1A"), (30, "2"), (40, "1A"), (50, "7")]
+    assert _longest_item_chain(candidates) == [(0, "1"), (10, "1A"), (30, "2"), (50, "7")]
+
+
+def test_chain_skips_out_of_order_headings():
+    candidates = [(0, "7"), (10, "1"), (20, "1A"), (30, "2"), (40, "1")]
+    assert _longest_item_chain(candidates) == [(10, "1"), (20, "1A"), (30, "2")]
+
+
+def test_chain_scales_to_many_headings():
+    rng = random.Random(0)
+    candidates = [(k, rng.choice(ITEM_ORDER)) for k in range(200_000)]
+    start = time.perf_counter()
+    chain = _longest_item_chain(candidates)
+    assert len(chain) == len(ITEM_ORDER)
+    assert time.perf_counter() - start < 10
+
+
+def test_table_of_contents_is_dropped():
+    toc = [(k * 10, item) for k, item in enumerate(["1", "1A", "2", "7", "8"])]
+    body = [(10_000 + k * 5_000, item) for k, item in enumerate(["1", "1A", "2", "7", "8"])]
+    assert _drop_table_of_contents(toc + body) == body
+
+
+def test_table_of_contents_scales_to_many_headings():
+    rng = random.Random(0)
+    candidates = [(k * 50, rng.choice(ITEM_ORDER)) for k in range(200_000)]
+    start = time.perf_counter()
+    _drop_table_of_contents(candidates)
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,52 @@
+import time
+
+from concernedEntreprises.scoreCache import ScoreCache
+from dataExtractionFromLaw.translationMemory import TranslationMemory
+from sqliteCache.sqliteCache import SqliteLRUCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return SqliteLRUCache(str(tmp_path / "cache.sqlite"), "entries", {"value": "TEXT NOT NULL"}, **kwargs)
+
+
+def test_round_trip_and_row_count_survive_reopen(tmp_path):
+    cache = make_cache(tmp_path, max_entries=100)
+    cache.put_many({"a": ("1",), "b": ("2",)})
+    assert cache.get_many(["a", "b", "c"]) == {"a": ("1",), "b": ("2",)}
+
+    reopened = make_cache(tmp_path, max_entries=100)
+    assert reopened.row_count == 2
+    assert len(reopened) == 2
+
+
+def test_evicts_least_recently_used_only_past_the_cap(tmp_path):
+    cache = make_cache(tmp_path, max_entries=10, evict_every=1_000)
+    for i in range(10):
+        cache.put_many({f"k{i}": (str(i),)})
+    cache.get_many(["k0"])
+    assert len(cache) == 10
+
+    cache.put_many({"k10": ("10",)})
+    # Redescend sous la limite : les plus anciennes partent, k0 (relue) reste
+    assert len(cache) == 9
+    assert "k0" in cache.get_many(["k0"])
+    assert cache.get_many(["k1", "k2"]) == {}
+
+
+def test_translation_memory_uses_shared_store(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite"), max_entries=100, memory_entries=1)
+    memory.put_many({"Bonjour  le monde": "Hello world"}, "fr", "en")
+    assert memory.get_many(["Bonjour le monde"], "fr", "en") == {"Bonjour le monde": "Hello world"}
+    assert len(memory) == 1
+
+
+def test_score_cache_ignores_then_drops_expired_scores(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"), ttl_seconds=60, max_entries=100)
+    cache.put_many({"k": {"score": 3, "reasoning": "r"}})
+    assert cache.get_many(["k", "missing"]) == {"k": {"score": 3, "reasoning": "r"}}
+
+    cache.store.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get_many(["k"]) == {}
+    cache.store._evict(time.time())
+    assert len(cache) == 0